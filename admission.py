@@ -0,0 +1,157 @@
+"""
+Admission control and backpressure for Gemini-bound requests.
+
+With ``--workers 2 --threads 4`` a handful of slow Gemini calls can occupy
+every gunicorn thread, leaving ``/health`` and the page routes queued
+behind them. ``ConcurrencyLimiter`` caps how many AI calls a worker runs
+at once and how many may wait for a slot; everything beyond that is
+rejected straight away with a 503. ``TokenBucketLimiter`` caps the rate of
+AI calls per client (429).
+
+Configuration comes from the environment:
+
+``AI_MAX_CONCURRENT``   AI calls running at once per worker (default 2)
+``AI_MAX_QUEUE``        requests allowed to wait for a slot (default 1)
+``AI_QUEUE_TIMEOUT``    seconds a queued request waits (default 2)
+``AI_RATE_PER_MINUTE``  sustained AI requests per client (default 20)
+``AI_RATE_BURST``       bucket size per client (default 5)
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """The request cannot be admitted now; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message, retry_after, status=503):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+
+
+class ConcurrencyLimiter:
+    """Bounded number of concurrent calls with a short, bounded wait queue."""
+
+    def __init__(self, max_concurrent=2, max_queue=1, queue_timeout=2.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_concurrent=int(os.getenv('AI_MAX_CONCURRENT', '2')),
+            max_queue=int(os.getenv('AI_MAX_QUEUE', '1')),
+            queue_timeout=float(os.getenv('AI_QUEUE_TIMEOUT', '2')),
+        )
+
+    @property
+    def retry_after(self):
+        return max(1, math.ceil(self.queue_timeout))
+
+    def acquire(self):
+        """Take a slot, waiting briefly if needed; raise ``Overloaded`` otherwise."""
+        with self._cond:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                self.admitted += 1
+                return
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise Overloaded("The AI coach is busy right now. Please try again shortly.", self.retry_after)
+            self.waiting += 1
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: self.active < self.max_concurrent, timeout=self.queue_timeout)
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                self.rejected_timeout += 1
+                raise Overloaded("The AI coach is busy right now. Please try again shortly.", self.retry_after)
+            self.active += 1
+            self.admitted += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'active': self.active,
+                'queue_depth': self.waiting,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'rejected_queue_full': self.rejected_queue_full,
+                'rejected_timeout': self.rejected_timeout,
+            }
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets; the least recently seen clients are forgotten first."""
+
+    def __init__(self, rate_per_minute=20, burst=5, max_clients=10000, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            rate_per_minute=float(os.getenv('AI_RATE_PER_MINUTE', '20')),
+            burst=float(os.getenv('AI_RATE_BURST', '5')),
+        )
+
+    def check(self, client_id):
+        """Spend a token for ``client_id``; raise ``Overloaded`` (429) if none is left."""
+        if self.rate <= 0:
+            return
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client_id, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[client_id] = (tokens - 1, now)
+                allowed = True
+            else:
+                self._buckets[client_id] = (tokens, now)
+                self.rejected += 1
+                allowed = False
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        if not allowed:
+            retry_after = max(1, math.ceil((1 - tokens) / self.rate))
+            raise Overloaded("Too many questions in a short time. Please slow down a little.", retry_after, status=429)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._buckets),
+                'rate_per_minute': self.rate * 60,
+                'burst': self.burst,
+                'rejected': self.rejected,
+            }
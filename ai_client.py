@@ -0,0 +1,132 @@
+"""
+Process-wide Gemini client for the FitAI coach.
+
+Configuring the SDK and constructing a ``GenerativeModel`` on every request
+throws away the underlying gRPC channel, so each chat turn paid for a fresh
+connection. ``FitnessAIClient`` builds the model once per process, on first
+use, and every gunicorn thread shares it. The coach persona is attached as a
+model-level system instruction instead of being prepended to each prompt.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from lazy_imports import LazyModule
+
+# Imported on first use: the SDK alone takes longer to import than the rest of the app
+genai = LazyModule('google.generativeai')
+
+MODEL_NAME = 'gemini-1.5-flash'
+
+SYSTEM_PROMPT = (
+    "You are FitAI, a professional, friendly, and encouraging AI fitness coach. "
+    "Your expertise includes workout routines, nutrition, injury prevention, and motivation. "
+    "Provide safe, clear, and actionable advice. If a question is outside the scope of "
+    "fitness, health, or nutrition, you must politely state that you can only answer fitness-related questions. "
+    "Keep your responses focused and easy to understand."
+)
+
+
+class AIClientNotConfigured(RuntimeError):
+    """Raised when no Gemini API key is available."""
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class FitnessAIClient:
+    """Lazily created, thread-safe wrapper around one shared ``GenerativeModel``.
+
+    Timings of recent calls are kept so the cost of the first (cold) call on a
+    new channel can be compared with warm calls that reuse the connection.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, system_instruction=SYSTEM_PROMPT, sample_size=1024):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self._lock = threading.Lock()
+        self._model = None
+        self._pid = None
+        self._setup_seconds = None
+        self._calls = 0
+        self._timings = deque(maxlen=sample_size)
+
+    @property
+    def configured(self):
+        return bool(os.getenv("GEMINI_API_KEY"))
+
+    def model(self):
+        """Return the shared model, creating it on first use in this process."""
+        if self._model is None or self._pid != os.getpid():
+            with self._lock:
+                # A forked worker must not reuse its parent's gRPC channel
+                if self._model is None or self._pid != os.getpid():
+                    api_key = os.getenv("GEMINI_API_KEY")
+                    if not api_key:
+                        raise AIClientNotConfigured("GEMINI_API_KEY is not set")
+                    start = time.perf_counter()
+                    genai.configure(api_key=api_key)
+                    self._model = genai.GenerativeModel(
+                        self.model_name, system_instruction=self.system_instruction)
+                    self._setup_seconds = time.perf_counter() - start
+                    self._pid = os.getpid()
+                    self._calls = 0
+        return self._model
+
+    def _start_call(self):
+        with self._lock:
+            self._calls += 1
+            return self._calls == 1
+
+    def _record(self, cold, seconds):
+        with self._lock:
+            self._timings.append((cold, seconds))
+
+    def generate(self, prompt, **kwargs):
+        """Run ``generate_content`` on the shared model and return the response."""
+        model = self.model()
+        cold = self._start_call()
+        start = time.perf_counter()
+        try:
+            return model.generate_content(prompt, **kwargs)
+        finally:
+            self._record(cold, time.perf_counter() - start)
+
+    def stream(self, prompt, **kwargs):
+        """Yield the text of each chunk from a streaming ``generate_content`` call."""
+        model = self.model()
+        cold = self._start_call()
+        start = time.perf_counter()
+        try:
+            for chunk in model.generate_content(prompt, stream=True, **kwargs):
+                yield chunk.text
+        finally:
+            self._record(cold, time.perf_counter() - start)
+
+    def stats(self):
+        """Summarise recent call latencies, split into cold and warm calls."""
+        with self._lock:
+            timings = list(self._timings)
+            setup = self._setup_seconds
+            calls = self._calls
+        warm = [seconds for cold, seconds in timings if not cold]
+        cold = [seconds for is_cold, seconds in timings if is_cold]
+        every = [seconds for _, seconds in timings]
+        return {
+            'model': self.model_name,
+            'calls': calls,
+            'setup_seconds': setup,
+            'cold_call_seconds': cold[-1] if cold else None,
+            'p50_seconds': _percentile(every, 50),
+            'p99_seconds': _percentile(every, 99),
+            'warm_p50_seconds': _percentile(warm, 50),
+            'warm_p99_seconds': _percentile(warm, 99),
+        }
+
+
+fitness_ai = FitnessAIClient()
@@ -1,64 +1,285 @@
-from flask import Flask, render_template, request, jsonify
-import random
-import pandas as pd
+from flask import Flask, Response, g, render_template, request, jsonify
+import math
 import os
-import requests
+import random
+import threading
+import time
 import json
+import logging
+from werkzeug.exceptions import RequestEntityTooLarge
 
 # STEP 1: ADDED NEW IMPORTS
-import google.generativeai as genai
 from dotenv import load_dotenv
 
 # STEP 2: LOAD ENVIRONMENT VARIABLES FROM .env FILE
+# (before the local modules below, some of which read their settings on import)
 load_dotenv()
 
+import log_config
+log_config.configure_logging()
+
+from admission import ConcurrencyLimiter, Overloaded, TokenBucketLimiter
+from ai_client import fitness_ai
+from certificate_jobs import CertificateJobs
+from catalogs import diet_catalog, exercise_catalog, meal_rng
+from conversations import ConversationStore
+from diet_batch import (HEALTH_LIMITS, STREAM_OVER as DIET_BATCH_STREAM_OVER, ProfileError,
+                        health_adjusted_diet_type, iter_plans, plan_type, validate_profiles)
+from faq import FaqAnswerer
+from food_swaps import FoodSwaps
+from meal_solver import solver_for
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, SIZE_BUCKETS, Registry
+from health_conditions import order_conditions, scan_health_conditions_stream
+from plan_cache import PlanCache, decode_plan_id, encode_plan_id, plan_seed
+from plans import WeeklyDietPlan, calculate_intensity, output
+from resilience import CircuitBreaker, CircuitOpen, RetryPolicy, transient_errors
+from response_cache import cache_key, response_cache
+from single_flight import SingleFlight, SqliteLease
+from static_pages import StaticAssets, StaticPages, build_asset, send_asset
+from uploads import MAX_UPLOAD_BYTES, UploadTooLarge, iter_chunks, iter_text
+
+log = logging.getLogger('fitai')
+
 app = Flask(__name__)
+# Oversized request bodies are refused before they are read (with some slack
+# for the multipart envelope); uploads.py enforces the exact file limit
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES + 64 * 1024
+
+# Pages without template variables are rendered once and served precompressed
+# with ETags; /static files likewise, under content-hashed URLs
+static_pages = StaticPages(app)
+static_assets = StaticAssets(app.static_folder)
+app.view_functions['static'] = static_assets.serve
+STATIC_TEMPLATES = ('Home.html', 'Sections.html', 'page5.html', 'day1.html', 'day2.html', 'day3.html',
+                    'day4.html', 'chatbot.html', 'ai_query.html')
+
+@app.url_defaults
+def version_static_urls(endpoint, values):
+    if endpoint == 'static' and 'v' not in values:
+        version = static_assets.version(values.get('filename', ''))
+        if version:
+            values['v'] = version
+
+# Local answers for common fitness/nutrition questions, indexed on first use
+faq_answerer = FaqAnswerer.from_catalogs(diet_catalog, exercise_catalog)
+# Nearest-neighbour food swaps over the catalog's nutrient vectors
+food_swaps = FoodSwaps(diet_catalog)
+
+# Deadline + bounded retries per question, and a breaker that makes requests
+# fail fast while Gemini is down instead of tying up worker threads
+ai_retry = RetryPolicy.from_env()
+ai_breaker = CircuitBreaker.from_env()
+
+# Identical questions asked at the same time share one Gemini call. With the
+# shared on-disk cache enabled this also works across gunicorn workers; a
+# worker waiting on another's answer gives up after the AI deadline.
+if response_cache.backend is not None:
+    ai_flight = SingleFlight(lease=SqliteLease(response_cache.backend.path), lookup=response_cache.peek,
+                             max_wait=ai_retry.timeout)
+else:
+    ai_flight = SingleFlight()
+
+# Backpressure: a few AI calls at a time per worker, so the cheap routes always
+# have a free thread, plus a per-client rate limit
+ai_limiter = ConcurrencyLimiter.from_env()
+ai_rate_limiter = TokenBucketLimiter.from_env()
+
+DEGRADED_ANSWER = (
+    "The AI Coach is temporarily unavailable. Please try again in a minute - "
+    "your workout and diet planners keep working in the meantime."
+)
+NOT_CONFIGURED_ANSWER = "Error: The AI Coach is not configured correctly. Please contact the administrator."
+ERROR_ANSWER = "Sorry, I'm having a little trouble connecting to my brain right now. Please try again in a moment."
+# Replies that are not real answers and are kept out of conversation history
+FALLBACK_ANSWERS = frozenset({DEGRADED_ANSWER, NOT_CONFIGURED_ANSWER, ERROR_ANSWER})
+
+
+class AIStreamError(Exception):
+    """Gemini failed partway through a streamed answer."""
+
+# PDF/DOCX certificates are parsed in a small process pool, off the request threads
+certificate_jobs = CertificateJobs.from_env()
+
+# Server-side chat sessions, each replayed upstream under a fixed token budget
+conversations = ConversationStore.from_env()
+
+# Seeded plans are reproducible, so rendered ones are kept per profile and
+# revalidated with ETags
+plan_cache = PlanCache.from_env()
+PLAN_CACHE_CONTROL = 'private, no-cache'
+
+# Prometheus metrics for /metrics, recorded in-process
+metrics = Registry()
+http_request_seconds = metrics.histogram(
+    'fitai_http_request_duration_seconds', 'Time to build a response, by endpoint.', ('endpoint', 'method', 'status'))
+gemini_call_seconds = metrics.histogram(
+    'fitai_gemini_call_duration_seconds', 'Gemini call latency per attempt, by outcome.', ('kind', 'outcome'))
+plan_generation_seconds = metrics.histogram(
+    'fitai_plan_generation_seconds', 'Time to generate a workout routine or diet plan.', ('plan',))
+plans_generated = metrics.counter(
+    'fitai_plans_generated_total', 'Plans generated through the batch API.', ('plan',))
+upload_size_bytes = metrics.histogram(
+    'fitai_upload_size_bytes', 'Size of uploaded medical certificates.', ('format',), buckets=SIZE_BUCKETS)
+upload_processing_seconds = metrics.histogram(
+    'fitai_upload_processing_seconds', 'Time to detect conditions in a certificate.', ('format', 'outcome'))
+certificate_jobs.on_finish = lambda extension, seconds, ok: upload_processing_seconds.observe(
+    seconds, extension, 'ok' if ok else 'error')
+for component, stats in (('ai_cache', response_cache.stats), ('ai_breaker', ai_breaker.stats),
+                         ('ai_admission', ai_limiter.stats), ('ai_single_flight', ai_flight.stats),
+                         ('faq', faq_answerer.stats), ('food_swaps', food_swaps.stats),
+                         ('conversations', conversations.stats),
+                         ('certificate_jobs', certificate_jobs.stats), ('plan_cache', plan_cache.stats)):
+    metrics.stats_gauges(f'fitai_{component}', f'Numeric fields of the {component} section of /health.', stats)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed responses are timed up to the first byte
+    started = g.pop('request_started', None)
+    if started is not None:
+        http_request_seconds.observe(time.perf_counter() - started,
+                                     request.endpoint or 'unmatched', request.method, str(response.status_code))
+    return response
+
+def build_prompt(message, context=""):
+    """Prompt sent upstream: profile/history context followed by the question"""
+    if context:
+        return f"{context}\n\nUser's question: {message}"
+    return message
+
+def ai_client_id():
+    """Identify the caller for rate limiting (Render sits behind a proxy)"""
+    # Clients can put anything in X-Forwarded-For; only the last hop, which
+    # the proxy appends itself, can be trusted
+    forwarded = request.headers.get('X-Forwarded-For', '')
+    return forwarded.split(',')[-1].strip() or request.remote_addr or 'unknown'
+
+def overloaded_response(error):
+    """Fast 429/503 reply with a Retry-After hint"""
+    response = jsonify({'error': str(error), 'status': 'error'})
+    response.status_code = error.status
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def generate_answer(prompt, timeout):
+    """One Gemini attempt, timed for /metrics"""
+    started = time.perf_counter()
+    try:
+        response = fitness_ai.generate(prompt, request_options={'timeout': timeout})
+    except Exception:
+        gemini_call_seconds.observe(time.perf_counter() - started, 'generate', 'error')
+        raise
+    gemini_call_seconds.observe(time.perf_counter() - started, 'generate', 'ok')
+    return response
+
+def ask_fitness_ai(message, context=""):
+    """Make one Gemini call and cache the answer"""
+    # The FitAI persona is set on the model as a system instruction
+    response = ai_breaker.call(lambda: ai_retry.call(
+        lambda timeout: generate_answer(build_prompt(message, context), timeout)))
+    log.debug("Gemini answer received", extra={'sampled': True, 'answer': response.text})
+    # Only successful answers are cached, never error messages
+    response_cache.set(message, context, response.text)
+    return response.text
 
 # STEP 3: REPLACED THE OLD FUNCTION WITH THE NEW GEMINI-POWERED FUNCTION
-def chat_with_fitness_ai(message, context=""):
+def answer_without_gemini(message, context=""):
+    """The reply when Gemini isn't needed or can't be asked, else None"""
+    # Swap requests and common FAQs are answered locally; with no API key
+    # that is all we have
+    local_answer = food_swaps.answer(message) or faq_answerer.answer(message, offline=not fitness_ai.configured)
+    if local_answer is not None:
+        return local_answer
+
+    cached = response_cache.get(message, context)
+    if cached is not None:
+        return cached
+
+    if not fitness_ai.configured:
+        log.error("Gemini API key is not configured", extra={'sampled': True})
+        return NOT_CONFIGURED_ANSWER
+    
+    # Don't queue for a slot while the breaker is open
+    if ai_breaker.state == CircuitBreaker.OPEN:
+        return DEGRADED_ANSWER
+    return None
+
+def chat_with_fitness_ai(message, context="", client_id=None):
     """
     Handles conversation with the Gemini API to provide fitness advice.
+    The model and its connection are shared by every request in this process,
+    and answers to repeat questions are served from the response cache.
+    Only questions that go to Gemini count against ``client_id``'s rate limit.
     """
-    # Get the API key you stored in the .env file
-    api_key = os.getenv("GEMINI_API_KEY")
-    print(f"DEBUG: API Key from env: {api_key[:10]}...{api_key[-4:] if api_key else 'None'}")
-    
-    if not api_key:
-        print("Error: Gemini API key is not configured in .env file.")
-        return "Error: The AI Coach is not configured correctly. Please contact the administrator."
+    answer = answer_without_gemini(message, context)
+    if answer is not None:
+        return answer
     
     try:
-        # Configure the Gemini library with your key
-        genai.configure(api_key=api_key)
-        print("DEBUG: Gemini configured successfully")
-        
-        # Define the AI's persona and instructions
-        system_prompt = (
-            "You are FitAI, a professional, friendly, and encouraging AI fitness coach. "
-            "Your expertise includes workout routines, nutrition, injury prevention, and motivation. "
-            "Provide safe, clear, and actionable advice. If a question is outside the scope of "
-            "fitness, health, or nutrition, you must politely state that you can only answer fitness-related questions. "
-            "Keep your responses focused and easy to understand."
-        )
+        if client_id is not None:
+            ai_rate_limiter.check(client_id)
+        # Admitted before joining an in-flight call, so a request waiting on
+        # another's answer holds a slot too and the wait stays bounded
+        with ai_limiter.slot():
+            # Concurrent identical questions wait for a single upstream call
+            return ai_flight.do(cache_key(message, context), lambda: ask_fitness_ai(message, context))
         
-        # Combine your instructions with the user's actual question
-        full_prompt = f"{system_prompt}\n\nUser's question: {message}"
-        print(f"DEBUG: Sending prompt: {full_prompt[:100]}...")
+    except Overloaded:
+        # Let the route answer with 429/503 instead of an apology
+        raise
+    except CircuitOpen:
+        return DEGRADED_ANSWER
+    except Exception:
+        # This will catch any errors if the API fails for some reason
+        log.exception("Gemini call failed", extra={'sampled': True})
+        return ERROR_ANSWER
 
-        # Call the Gemini model to get a response
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(full_prompt)
-        
-        print("DEBUG: Response received successfully")
-        # Send the AI's text response back to the user
-        return response.text
-        
+def stream_fitness_ai(message, context=""):
+    """
+    Streaming counterpart of chat_with_fitness_ai: yields the answer in chunks
+    as Gemini generates them, so the first tokens reach the user right away.
+    Callers check answer_without_gemini first.
+    Raises AIStreamError if Gemini fails, even after some chunks were sent.
+    """
+    try:
+        ai_breaker.before_call()
+    except CircuitOpen:
+        yield DEGRADED_ANSWER
+        return
+
+    parts = []
+    outcome = 'abandoned'
+    started = time.perf_counter()
+    try:
+        for text in fitness_ai.stream(build_prompt(message, context), request_options={'timeout': ai_retry.timeout}):
+            parts.append(text)
+            yield text
     except Exception as e:
-        # This will catch any errors if the API fails for some reason
-        print(f"An error occurred with the Gemini API: {e}")
-        import traceback
-        traceback.print_exc()
-        return "Sorry, I'm having a little trouble connecting to my brain right now. Please try again in a moment."
+        outcome = 'error'
+        log.exception("Gemini stream failed", extra={'sampled': True})
+        raise AIStreamError(ERROR_ANSWER) from e
+    else:
+        outcome = 'ok'
+    finally:
+        # Also runs when the browser disconnects mid-stream, which says
+        # nothing about Gemini's health
+        gemini_call_seconds.observe(time.perf_counter() - started, 'stream', outcome)
+        if outcome == 'ok':
+            ai_breaker.record_success()
+        elif outcome == 'error':
+            ai_breaker.record_failure()
+        else:
+            ai_breaker.record_abandoned()
+
+    response_cache.set(message, context, ''.join(parts))
+
+def sse_event(data, event=None):
+    """Format one Server-Sent Event carrying a JSON payload"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
 
 def get_fitness_context(user_data=None):
     """
@@ -67,188 +288,196 @@ def get_fitness_context(user_data=None):
     if user_data:
         return f"User context: Weight: {user_data.get('weight', 'N/A')}kg, Height: {user_data.get('height', 'N/A')}cm, Goal: {user_data.get('goal', 'general fitness')}"
     return ""
-def load_exercises():
-    return pd.read_csv('exercises.csv')
-
-# Routine generator logic using the dataset
-def output(intensity):
-    df = load_exercises()  # Load dataset
-    routine_list = []
-
-    def add_exercises(category, max_intensity_ratio):
-        max_intensity = intensity * max_intensity_ratio
-        current_sum = 0
-
-        category_exercises = df[df['category'] == category]  # Filter by category
-
-        for _, exercise in category_exercises.iterrows():
-            current_sum += 1  # Each exercise counts as one in the total
-            if max_intensity > current_sum:
-                reps_min = exercise['reps_min']
-                reps_max = exercise['reps_max']
-
-                if pd.notnull(reps_min) and pd.notnull(reps_max):
-                    reps = random.randint(reps_min, reps_max)
-                    routine_list.append(f"{exercise['exercise_name']} - {reps} reps")
-                else:
-                    routine_list.append(f"{exercise['exercise_name']} - Duration-based")
-            else:
-                break
-
-    # Add warmup, main exercises, and cooldown
-    add_exercises('warmup', 0.2)
-    add_exercises('exercise', 0.6)
-    add_exercises('cooldown', 0.2)
-
-    return routine_list
-
-# Function to calculate BMI and adjust intensity
-def calculate_intensity(weight, height):
-    height_in_meters = height / 100
-    bmi = weight / (height_in_meters ** 2)
-
-    if bmi < 18.5:
-        return 50  # Low intensity for underweight
-    elif 18.5 <= bmi < 24.9:
-        return 70  # Moderate intensity for normal weight
-    elif 25 <= bmi < 29.9:
-        return 60  # Moderate intensity for overweight
-    else:
-        return 40  # Lower intensity for obesity
+def plan_response(key, render):
+    """Rendered plan for ``key``, generated once and then served from the plan cache."""
+    asset = plan_cache.get_or_create(
+        key, lambda: build_asset(render().encode('utf-8'), 'text/html; charset=utf-8', compress=False))
+    return send_asset(asset, PLAN_CACHE_CONTROL)
 
 @app.route('/health')
 def health_check():
     """Health check endpoint for Render monitoring"""
-    return jsonify({'status': 'healthy', 'service': 'FitAI Backend'}), 200
+    breaker = ai_breaker.stats()
+    # Still 200 while degraded: the planners work without Gemini
+    status = 'degraded' if breaker['state'] == CircuitBreaker.OPEN else 'healthy'
+    return jsonify({'status': status, 'service': 'FitAI Backend', 'ai': fitness_ai.stats(), 'ai_breaker': breaker,
+                    'faq': faq_answerer.stats(), 'food_swaps': food_swaps.stats(),
+                    'conversations': conversations.stats(), 'ai_cache': response_cache.stats(),
+                    'ai_single_flight': ai_flight.stats(),
+                    'ai_admission': ai_limiter.stats(), 'ai_rate_limit': ai_rate_limiter.stats(),
+                    'certificate_jobs': certificate_jobs.stats(), 'logging': log_config.stats(),
+                    'static_pages': static_pages.stats(), 'static_assets': static_assets.stats(),
+                    'plan_cache': plan_cache.stats()}), 200
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
 
 @app.route('/gen')
 def index():
     return render_template('index.html')
 
-@app.route('/generate', methods=['POST'])
+@app.route('/generate', methods=['GET', 'POST'])
 def generate():
-    weight = float(request.form['weight'])
-    height = float(request.form['height'])
+    # GET with the same fields gives a bookmarkable, revalidatable plan URL
+    weight = float(request.values['weight'])
+    height = float(request.values['height'])
     intensity = calculate_intensity(weight, height)
-    routine = output(intensity)
-    return render_template('index.html', routine=routine)
+    seed = plan_seed((weight, height), request.values.get('plan_version', ''))
 
-@app.route("/")
-def diet():
-    return render_template("Home.html")
-
-# Load diet data from CSV
-def load_diet_data():
-    return pd.read_csv('diet_data.csv')
-
-class WeeklyDietPlan:
-    def __init__(self, age, height, weight, goal, duration, diet_type, gender, activity_level, health_conditions=None):
-        self.age = age
-        self.height = height
-        self.weight = weight
-        self.goal = goal
-        self.duration = duration
-        self.diet_type = diet_type
-        self.gender = gender
-        self.activity_level = activity_level
-        self.health_conditions = health_conditions or []
-        self.bmr = self.calculate_bmr()
-        self.daily_calories = self.adjust_calories()
-        self.diet_data = load_diet_data()  # Load dataset here
-        self.plan = self.create_diet_plan()
-
-    def calculate_bmr(self):
-        if self.gender == 'male':
-            return 10 * self.weight + 6.25 * self.height - 5 * self.age + 5
-        else:
-            return 10 * self.weight + 6.25 * self.height - 5 * self.age - 161
+    def render():
+        with plan_generation_seconds.time('routine'):
+            routine = output(intensity, random.Random(seed))
+        return render_template('index.html', routine=routine)
 
-    def adjust_calories(self):
-        if self.goal == 'weight gain':
-            return self.bmr + 500
-        elif self.goal == 'weight loss':
-            return self.bmr - 500
-        else:
-            return self.bmr  # Maintenance
+    return plan_response(('routine', weight, height, seed, exercise_catalog.version()), render)
 
-    def create_diet_plan(self):
-        # Adjust diet based on health conditions
-        adjusted_diet_type = self.adjust_diet_for_health_conditions()
-        
-        if self.diet_type == 'weight gain':
-            return {f'Day {i+1}': self.get_meal_plan(i+1, 'weight_gain', adjusted_diet_type) for i in range(7)}
-        elif self.diet_type == 'weight loss':
-            return {f'Day {i+1}': self.get_meal_plan(i+1, 'weight_loss', adjusted_diet_type) for i in range(7)}
-        else:
-            return {f'Day {i+1}': self.get_meal_plan(i+1, 'maintenance', adjusted_diet_type) for i in range(7)}
-    
-    def adjust_diet_for_health_conditions(self):
-        """Adjust diet recommendations based on health conditions"""
-        if not self.health_conditions:
-            return self.diet_type
-        
-        # Health condition specific adjustments
-        if 'Diabetes' in self.health_conditions:
-            return 'diabetic_friendly'
-        elif 'High Blood Pressure' in self.health_conditions:
-            return 'low_sodium'
-        elif 'Heart Disease' in self.health_conditions:
-            return 'heart_healthy'
-        elif 'High Cholesterol' in self.health_conditions:
-            return 'low_cholesterol'
-        else:
-            return self.diet_type
+@app.route('/api/routine', methods=['GET', 'POST'])
+def routine_api():
+    """Structured workout routine for a weight (kg) and height (cm)"""
+    data = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    try:
+        weight = float(data['weight'])
+        height = float(data['height'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Numeric weight and height are required', 'status': 'error'}), 400
+    if not (math.isfinite(weight) and math.isfinite(height)) or weight <= 0 or height <= 0:
+        return jsonify({'error': 'Weight and height must be positive', 'status': 'error'}), 400
 
-    def get_meal_plan(self, day, diet_type, adjusted_diet_type):
-        # Filter the dataset by diet_type
-        meals = self.diet_data[self.diet_data['diet_type'] == diet_type]
-        meal_plan = {}
+    intensity = calculate_intensity(weight, height)
+    with plan_generation_seconds.time('routine'):
+        routine = exercise_catalog.get().skeleton(intensity).to_dict()
+    return jsonify({**routine, 'bmi': round(weight / (height / 100) ** 2, 1), 'status': 'success'})
+
+@app.route("/")
+def diet():
+    return static_pages.serve("Home.html")
+
+DIET_PROFILE_FIELDS = ('age', 'height', 'weight', 'goal', 'duration', 'diet_type', 'gender', 'activity_level')
+
+def parse_diet_profile(values):
+    """``(profile, health_conditions, plan_version)`` from form fields or a JSON object"""
+    profile = (int(values["age"]), float(values["height"]), float(values["weight"]), values["goal"],
+               int(values["duration"]), values["diet_type"], values["gender"], values["activity_level"])
+    # NaN or a negative weight would reach the meal solver as a calorie target
+    if not all(math.isfinite(value) and value > 0 for value in profile[:3]):
+        raise ValueError("age, height and weight must be positive")
+
+    # Get health conditions if provided; the form sends them JSON encoded
+    health_conditions = values.get("health_conditions") or []
+    if isinstance(health_conditions, str):
+        health_conditions = json.loads(health_conditions)
+    if not isinstance(health_conditions, list) or not all(isinstance(c, str) for c in health_conditions):
+        raise ValueError("health_conditions must be a list of condition names")
+    return profile, health_conditions, str(values.get("plan_version", ""))
 
-        # Group meals by meal_type and generate the plan
-        for meal_type in ['Breakfast', 'Mid-Morning', 'Lunch', 'Afternoon Snack', 'Dinner', 'Before Bed']:
-            selected_meal = meals[meals['meal_type'] == meal_type].sample(1).iloc[0]  # Pick one random meal for each type
-            meal_plan[meal_type] = f"{selected_meal['food_item']} - {selected_meal['calories']} calories"
-        
-        # Add health condition specific notes
-        if adjusted_diet_type != diet_type:
-            meal_plan['Health Notes'] = self.get_health_specific_notes(adjusted_diet_type)
-        
-        return meal_plan
-    
-    def get_health_specific_notes(self, adjusted_diet_type):
-        """Get specific dietary notes based on health conditions"""
-        notes = {
-            'diabetic_friendly': 'Focus on low glycemic index foods, monitor carbohydrate intake',
-            'low_sodium': 'Limit salt intake, avoid processed foods, use herbs for flavoring',
-            'heart_healthy': 'Emphasize omega-3 fatty acids, limit saturated fats',
-            'low_cholesterol': 'Reduce animal fats, increase fiber intake, focus on plant-based proteins'
-        }
-        return notes.get(adjusted_diet_type, '')
 @app.route("/diet", methods=["GET", "POST"])
 def diet_plan():
-    diet_plan = None
-    if request.method == "POST":
-        age = int(request.form["age"])
-        height = float(request.form["height"])
-        weight = float(request.form["weight"])
-        goal = request.form["goal"]
-        duration = int(request.form["duration"])
-        diet_type = request.form["diet_type"]
-        gender = request.form["gender"]
-        activity_level = request.form["activity_level"]
-        
-        # Get health conditions if provided
-        health_conditions = []
-        if "health_conditions" in request.form:
-            try:
-                health_conditions = json.loads(request.form["health_conditions"])
-            except (json.JSONDecodeError, KeyError):
-                health_conditions = []
-
-        user = WeeklyDietPlan(age, height, weight, goal, duration, diet_type, gender, activity_level, health_conditions)
-        diet_plan = user.plan
+    # The plan form is a POST; a GET with the same fields in the query string
+    # gives a bookmarkable, revalidatable plan URL
+    if request.method != "POST" and "age" not in request.args:
+        return render_template("diet.html", diet_plan=None)
 
-    return render_template("diet.html", diet_plan=diet_plan)
+    try:
+        profile, health_conditions, plan_version = parse_diet_profile(request.values)
+    except (KeyError, TypeError, ValueError):
+        return render_template("diet.html", diet_plan=None,
+                               error="Please check your age, height, weight and health conditions"), 400
+    age, height, weight, goal, duration, diet_type, gender, activity_level = profile
+    seed = plan_seed(profile, plan_version)
+    # Only the resulting adjustment changes the plan, not the exact list of conditions
+    adjustment = health_adjusted_diet_type(diet_type, health_conditions)
+
+    def render():
+        with plan_generation_seconds.time('diet'):
+            user = WeeklyDietPlan(age, height, weight, goal, duration, diet_type, gender, activity_level,
+                                  health_conditions, seed=seed)
+        return render_template("diet.html", diet_plan=user.plan)
+
+    return plan_response(("diet", profile, adjustment, seed, diet_catalog.version()), render)
+
+def diet_week_response(plan_id, number):
+    try:
+        profile, health_conditions, plan_version = parse_diet_profile(decode_plan_id(plan_id))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return jsonify({'error': 'Unknown plan', 'status': 'error'}), 404
+    plan = WeeklyDietPlan(*profile, health_conditions, seed=plan_seed(profile, plan_version))
+    if not 1 <= number <= plan.weeks:
+        return jsonify({'error': f"week must be between 1 and {plan.weeks}", 'status': 'error'}), 400
+    days = plan.week(number)
+    first_day = (number - 1) * 7 + 1
+    response = jsonify({'plan_id': plan_id, 'week': number, 'weeks': plan.weeks, 'status': 'success',
+                        'days': [{'day': day, 'meals': meals} for day, meals in enumerate(days.values(), first_day)]})
+    # The id pins the profile and seed, so a week never changes
+    response.headers['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+@app.route('/api/diet/plan', methods=['POST'])
+def diet_plan_create_api():
+    """Start a multi-week plan; returns its id and the first week"""
+    data = request.get_json(silent=True)
+    try:
+        profile, health_conditions, plan_version = parse_diet_profile(data)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return jsonify({'error': f"Required fields: {', '.join(DIET_PROFILE_FIELDS)}; "
+                                 "health_conditions must be a list of condition names", 'status': 'error'}), 400
+    # The id carries the profile itself, so any worker can regenerate any week
+    plan_id = encode_plan_id({**dict(zip(DIET_PROFILE_FIELDS, profile)),
+                              'health_conditions': health_conditions, 'plan_version': plan_version})
+    return diet_week_response(plan_id, 1)
+
+@app.route('/api/diet/plan/<plan_id>')
+def diet_plan_week_api(plan_id):
+    """One week of a plan: /api/diet/plan/<id>?week=N"""
+    week = request.args.get('week', 1, type=int)
+    return diet_week_response(plan_id, week)
+
+@app.route('/api/diet/swap')
+def diet_swap_api():
+    """Foods most similar to ?food=, optionally filtered by meal_type, diet_type and health_conditions"""
+    food = request.args.get('food', '').strip()
+    if not food:
+        return jsonify({'error': 'food is required', 'status': 'error'}), 400
+    k = min(max(request.args.get('k', 5, type=int), 1), 50)
+    health_conditions = [c.strip() for c in request.args.get('health_conditions', '').split(',') if c.strip()]
+    result = food_swaps.swaps(food, k, meal_type=request.args.get('meal_type') or None,
+                              diet_type=request.args.get('diet_type') or None, health_conditions=health_conditions)
+    if result is None:
+        return jsonify({'error': f'Unknown food: {food}', 'status': 'error'}), 404
+    item, swaps = result
+    return jsonify({'food': item, 'swaps': swaps, 'status': 'success'})
+
+@app.route('/api/diet/batch', methods=['POST'])
+def diet_batch_api():
+    """Diet plans for a list of profiles, as JSON or (for large batches) NDJSON
+
+    Meals are drawn at random per plan type and ignore each profile's
+    daily_calories, so they differ from the solved plan /diet gives the
+    same profile.
+    """
+    data = request.get_json(silent=True)
+    profiles = data.get('profiles') if isinstance(data, dict) else data
+    seed = data.get('seed') if isinstance(data, dict) else None
+    try:
+        validate_profiles(profiles)
+        rng = meal_rng(seed)
+    except (ProfileError, TypeError, ValueError) as e:
+        return jsonify({'error': str(e), 'status': 'error'}), 400
+    index = diet_catalog.get()
+
+    wants_stream = 'application/x-ndjson' in request.headers.get('Accept', '')
+    if wants_stream or len(profiles) > DIET_BATCH_STREAM_OVER:
+        def stream():
+            for plan in iter_plans(profiles, index, rng):
+                yield json.dumps(plan) + '\n'
+            plans_generated.inc('diet_batch', amount=len(profiles))
+        return Response(stream(), content_type='application/x-ndjson')
+
+    with plan_generation_seconds.time('diet_batch'):
+        plans = list(iter_plans(profiles, index, rng))
+    plans_generated.inc('diet_batch', amount=len(plans))
+    return jsonify({'plans': plans, 'count': len(plans), 'status': 'success'})
 
 @app.route('/sport', methods=['GET', 'POST'])
 def home():
@@ -268,39 +497,39 @@ def home():
 
 @app.route("/workout")
 def work():
-    return render_template("Sections.html")
+    return static_pages.serve("Sections.html")
 
 
 @app.route("/GP")
 def gp():
-    return render_template("page5.html")
+    return static_pages.serve("page5.html")
 @app.route("/D1")
 def d1():
-    return render_template("day1.html")
+    return static_pages.serve("day1.html")
 
 @app.route("/D3")
 def d3():
-    return render_template("day3.html")
+    return static_pages.serve("day3.html")
 @app.route("/D4")
 def d4():
-    return render_template("day4.html")
+    return static_pages.serve("day4.html")
 
 
 
 @app.route("/D2")
 def d2():
-    return render_template("day2.html")
+    return static_pages.serve("day2.html")
 
 # AI Chatbot Routes
 @app.route('/ai-coach')
 def ai_coach():
     """Display the AI fitness coach chatbot interface"""
-    return render_template('chatbot.html')
+    return static_pages.serve('chatbot.html')
 
 @app.route('/ai_query', methods=['GET', 'POST'])
 def ai_query():
     """Display the AI fitness assistant interface"""
-    return render_template('ai_query.html')
+    return static_pages.serve('ai_query.html')
 
 @app.route('/api/ai_query', methods=['POST'])
 def ai_query_api():
@@ -313,13 +542,15 @@ def ai_query_api():
             return jsonify({'error': 'User prompt is required'}), 400
         
         # Get AI response using the existing chat_with_fitness_ai function
-        ai_response = chat_with_fitness_ai(user_prompt)
+        ai_response = chat_with_fitness_ai(user_prompt, client_id=ai_client_id())
         
         return jsonify({
             'response': ai_response,
             'status': 'success'
         })
         
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({
             'error': f'Server error: {str(e)}',
@@ -334,32 +565,82 @@ def chat_api():
         message = data.get('message', '').strip()
         user_context = data.get('context', {})
         
-        print(f"DEBUG: Received message: {message}")
-        print(f"DEBUG: User context: {user_context}")
+        log.debug("Chat message received", extra={'sampled': True, 'user_message': message, 'context': user_context})
         
         if not message:
             return jsonify({'error': 'Message is required'}), 400
         
-        # Generate context from user data if available
-        context = get_fitness_context(user_context)
+        # Profile context plus a budgeted slice of the earlier conversation
+        conversation = conversations.get(data.get('conversation_id'))
+        message, context = conversations.prepare(conversation, message, get_fitness_context(user_context))
         
         # Get AI response
-        ai_response = chat_with_fitness_ai(message, context)
+        ai_response = chat_with_fitness_ai(message, context, client_id=ai_client_id())
+        if ai_response not in FALLBACK_ANSWERS:
+            conversations.record(conversation, message, ai_response)
         
-        print(f"DEBUG: AI response: {ai_response}")
+        log.debug("Chat answer sent", extra={'sampled': True, 'answer': ai_response})
         
         return jsonify({
             'response': ai_response,
+            'conversation_id': conversation.id,
             'status': 'success'
         })
         
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
-        print(f"DEBUG: Error occurred: {str(e)}")
+        log.exception("Chat request failed")
         return jsonify({
             'error': f'Server error: {str(e)}',
             'status': 'error'
         }), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream_api():
+    """Streaming chatbot endpoint: sends the answer as Server-Sent Events"""
+    data = request.get_json(silent=True) or {}
+    message = (data.get('message') or data.get('user_prompt') or '').strip()
+    
+    if not message:
+        return jsonify({'error': 'Message is required'}), 400
+    
+    conversation = conversations.get(data.get('conversation_id'))
+    message, context = conversations.prepare(conversation, message, get_fitness_context(data.get('context', {})))
+    
+    # FAQ, cached and fallback answers are sent straight away; only a Gemini
+    # stream is rate limited and holds a slot, until the whole answer is sent
+    ready = answer_without_gemini(message, context)
+    if ready is None:
+        try:
+            ai_rate_limiter.check(ai_client_id())
+            ai_limiter.acquire()
+        except Overloaded as e:
+            return overloaded_response(e)
+    
+    def events():
+        parts = []
+        try:
+            for text in ([ready] if ready is not None else stream_fitness_ai(message, context)):
+                parts.append(text)
+                yield sse_event({'text': text})
+        except AIStreamError as e:
+            # The partial answer is not a real turn, so it is not recorded
+            yield sse_event({'status': 'error', 'error': str(e)}, event='error')
+            return
+        answer = ''.join(parts)
+        if answer not in FALLBACK_ANSWERS:
+            conversations.record(conversation, message, answer)
+        yield sse_event({'status': 'success', 'conversation_id': conversation.id}, event='done')
+    
+    response = Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    if ready is None:
+        response.call_on_close(ai_limiter.release)
+    return response
+
 @app.route('/upload_medical_certificate', methods=['POST'])
 def upload_medical_certificate():
     """Handle medical certificate upload and extract health conditions"""
@@ -378,34 +659,24 @@ def upload_medical_certificate():
         if file_extension not in allowed_extensions:
             return jsonify({'success': False, 'error': 'File type not supported. Please upload PDF, DOCX, or TXT files.'}), 400
         
-        # Extract text based on file type
-        text_content = ""
+        # Werkzeug spools the upload to memory or disk; measure it without reading
+        upload_size_bytes.observe(file.stream.seek(0, os.SEEK_END), file_extension)
+        file.stream.seek(0)
         
+        # Extract text based on file type
         if file_extension == 'txt':
-            # Handle text files
-            try:
-                text_content = file.read().decode('utf-8')
-            except UnicodeDecodeError:
-                text_content = file.read().decode('latin-1')
-        
-        elif file_extension == 'pdf':
-            # For PDFs, we'll return a message asking users to copy-paste text
-            # This avoids heavy PyPDF2 dependency
-            return jsonify({
-                'success': False, 
-                'error': 'PDF processing requires text extraction. Please copy-paste the text content or convert to TXT format.'
-            }), 400
+            # Text files are decoded and scanned chunk by chunk, so memory use
+            # doesn't grow with the size of the upload
+            started = time.perf_counter()
+            matches = scan_health_conditions_stream(iter_text(file.stream))
+            health_conditions = order_conditions(match.condition for match in matches)
+            upload_processing_seconds.observe(time.perf_counter() - started, 'txt', 'ok')
         
-        elif file_extension == 'docx':
-            # For DOCX files, we'll return a message asking users to copy-paste text
-            # This avoids heavy python-docx dependency
-            return jsonify({
-                'success': False, 
-                'error': 'DOCX processing requires text extraction. Please copy-paste the text content or convert to TXT format.'
-            }), 400
-        
-        # Detect health conditions from text
-        health_conditions = detect_health_conditions_from_text(text_content)
+        else:
+            # PDF/DOCX parsing is CPU-heavy: queue a background job and let the
+            # page poll /upload_medical_certificate/jobs/<job_id> for the result
+            job_id = certificate_jobs.submit(iter_chunks(file.stream), file_extension)
+            return jsonify({'success': True, 'status': 'pending', 'job_id': job_id}), 202
         
         # Format conditions for display
         conditions_text = ', '.join(health_conditions) if health_conditions else 'None'
@@ -416,52 +687,59 @@ def upload_medical_certificate():
             'conditions_text': conditions_text
         })
         
+    except Overloaded as e:
+        return overloaded_response(e)
+    except UploadTooLarge as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
+    except RequestEntityTooLarge:
+        return jsonify({'success': False, 'error': str(UploadTooLarge(MAX_UPLOAD_BYTES))}), 413
     except Exception as e:
         return jsonify({'success': False, 'error': f'Error processing file: {str(e)}'}), 500
 
-def detect_health_conditions_from_text(text):
-    """Detect health conditions from text content"""
-    if not text:
-        return []
-    
-    text_lower = text.lower()
-    detected_conditions = []
-    
-    # Medical condition keywords mapping
-    conditions = {
-        "diabetes": "Diabetes",
-        "diabetic": "Diabetes",
-        "blood sugar": "Diabetes",
-        "glucose": "Diabetes",
-        "high blood pressure": "High Blood Pressure",
-        "hypertension": "High Blood Pressure",
-        "bp": "High Blood Pressure",
-        "heart disease": "Heart Disease",
-        "cardiac": "Heart Disease",
-        "coronary": "Heart Disease",
-        "asthma": "Asthma",
-        "respiratory": "Respiratory Issues",
-        "cancer": "Cancer",
-        "tumor": "Cancer",
-        "malignant": "Cancer",
-        "kidney disease": "Kidney Disease",
-        "renal": "Kidney Disease",
-        "lung disease": "Lung Disease",
-        "pulmonary": "Lung Disease",
-        "arthritis": "Arthritis",
-        "thyroid": "Thyroid Disorder",
-        "cholesterol": "High Cholesterol",
-        "migraine": "Migraine",
-        "depression": "Depression",
-        "anxiety": "Anxiety"
-    }
-    
-    # Check for each condition
-    for keyword, condition in conditions.items():
-        if keyword in text_lower and condition not in detected_conditions:
-            detected_conditions.append(condition)
-    
-    return detected_conditions
+@app.route('/upload_medical_certificate/jobs/<job_id>')
+def medical_certificate_job(job_id):
+    """Status of a PDF/DOCX extraction job, with the conditions once done"""
+    job = certificate_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown or expired job'}), 404
+    if job['status'] == 'failed':
+        return jsonify({'success': False, 'status': 'failed', 'error': job['error']})
+    health_conditions = job['health_conditions']
+    return jsonify({
+        'success': True,
+        'status': job['status'],
+        'health_conditions': health_conditions,
+        'conditions_text': ', '.join(health_conditions) if health_conditions else 'None'
+    })
+
+def warm_up():
+    """Load what the first planner and AI requests need: heavy modules, catalogs, meal solvers, FAQ index, Gemini model"""
+    started = time.perf_counter()
+    try:
+        exercise_catalog.get()
+        diet_index = diet_catalog.get()
+        for diet_type in ('weight gain', 'weight loss', 'maintenance'):
+            for goal in ('weight gain', 'weight loss', 'maintenance'):
+                for limits in (None, *HEALTH_LIMITS.values()):
+                    solver_for(diet_index, plan_type(diet_type), goal, limits=limits)
+        faq_answerer.index
+        food_swaps.index
+        transient_errors()
+        static_pages.prerender(STATIC_TEMPLATES)
+        if fitness_ai.configured:
+            fitness_ai.model()
+    except Exception:
+        log.exception("Warm-up failed")
+    else:
+        log.info("Warm-up finished", extra={'seconds': round(time.perf_counter() - started, 3)})
+
+def start_warm_up():
+    """Run warm_up() on a background thread (set WARMUP=0 to skip it)"""
+    if os.getenv('WARMUP', '1') == '0':
+        return None
+    thread = threading.Thread(target=warm_up, name='fitai-warm-up', daemon=True)
+    thread.start()
+    return thread
 
 def create_app():
     """Application factory pattern for better deployment"""
@@ -470,4 +748,5 @@ def create_app():
 if __name__ == '__main__':
     # For production, use a proper WSGI server like gunicorn
     # For local development, run with debug mode
+    start_warm_up()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,63 @@
+"""
+Benchmark diet plan throughput: WeeklyDietPlan one at a time, and the
+vectorised batch path behind /api/diet/batch. Both report plans per second.
+A WeeklyDietPlan fits every day of its first week with the meal solver,
+while the batch path draws meals at random, so they do different work.
+
+Usage:
+    python benchmarks/bench_diet.py [--plans 1000] [--batch-size 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import WeeklyDietPlan
+from catalogs import diet_catalog, meal_rng
+from diet_batch import iter_plans, validate_profiles
+
+PROFILE = (30, 175, 70, 'weight loss', 4, 'weight loss', 'female', 'moderate', ['Diabetes'])
+
+
+def batch_profiles(size):
+    """``size`` varied profiles in the batch API's format."""
+    goals = ('weight loss', 'weight gain', 'maintenance')
+    return [{'age': 20 + i % 50, 'height': 150 + i % 45, 'weight': 50 + i % 60,
+             'gender': 'male' if i % 2 else 'female', 'goal': goals[i % 3], 'diet_type': goals[(i + 1) % 3],
+             'activity_level': 'moderate', 'health_conditions': ['Diabetes'] if i % 7 == 0 else []}
+            for i in range(size)]
+
+
+def report(label, plans, elapsed):
+    print(label)
+    print(f"  {elapsed / plans * 1e6:8.1f} us/plan  ({plans / elapsed:10.1f} plans/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--plans', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    WeeklyDietPlan(*PROFILE).plan  # loads the catalog and builds the meal solver
+    start = time.perf_counter()
+    for _ in range(args.plans):
+        WeeklyDietPlan(*PROFILE).plan
+    report(f"WeeklyDietPlan, {args.plans} plans", args.plans, time.perf_counter() - start)
+
+    profiles = batch_profiles(args.batch_size)
+    index, rng = diet_catalog.get(), meal_rng()
+    batches = max(1, args.plans // args.batch_size)
+    start = time.perf_counter()
+    for _ in range(batches):
+        validate_profiles(profiles)
+        for _ in iter_plans(profiles, index, rng):
+            pass
+    report(f"batch of {args.batch_size}, {batches * args.batch_size} plans", batches * args.batch_size,
+           time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
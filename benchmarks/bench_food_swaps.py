@@ -0,0 +1,44 @@
+"""
+Benchmark food swap lookups on a synthetic catalog.
+
+Usage:
+    python benchmarks/bench_food_swaps.py [--foods 5000] [--queries 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from bench_meal_solver import synthetic_catalog
+from catalogs import DietIndex
+from food_swaps import SwapIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--foods', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = SwapIndex(DietIndex.from_frame(synthetic_catalog(args.foods)))
+    print(f"{args.foods} foods, index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rows = np.random.default_rng(0).integers(0, args.foods, args.queries)
+    start = time.perf_counter()
+    for row in rows:
+        index.nearest([row], k=5, mask=index.allowed(meal_type='Lunch', health_conditions=['Diabetes']))
+    single = (time.perf_counter() - start) / args.queries
+    start = time.perf_counter()
+    index.nearest(rows[:100], k=5)
+    batched = (time.perf_counter() - start) / 100
+    print(f"  filtered lookup {single * 1e6:.0f} us, batched (100 at once) {batched * 1e6:.0f} us/query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark POST /generate before and after the in-memory exercise catalog.
+
+The "before" numbers come from the original implementation, which parsed
+exercises.csv with pandas and walked the rows with iterrows() on every
+request. Both variants are driven through Flask's test client, so the
+numbers include routing and template rendering. The rendered-plan cache is
+disabled for both runs, so every request generates its routine.
+
+Usage:
+    python benchmarks/bench_generate.py [--requests 500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import app as fitai
+from catalogs import EXERCISES_CSV
+from plan_cache import PlanCache
+
+
+def legacy_output(intensity, rng=random):
+    """The original per-request pandas implementation of output()."""
+    df = pd.read_csv(EXERCISES_CSV)
+    routine_list = []
+
+    def add_exercises(category, max_intensity_ratio):
+        max_intensity = intensity * max_intensity_ratio
+        current_sum = 0
+        for _, exercise in df[df['category'] == category].iterrows():
+            current_sum += 1
+            if max_intensity > current_sum:
+                reps_min = exercise['reps_min']
+                reps_max = exercise['reps_max']
+                if pd.notnull(reps_min) and pd.notnull(reps_max):
+                    reps = rng.randint(reps_min, reps_max)
+                    routine_list.append(f"{exercise['exercise_name']} - {reps} reps")
+                else:
+                    routine_list.append(f"{exercise['exercise_name']} - Duration-based")
+            else:
+                break
+
+    add_exercises('warmup', 0.2)
+    add_exercises('exercise', 0.6)
+    add_exercises('cooldown', 0.2)
+    return routine_list
+
+
+def requests_per_second(client, total):
+    form = {'weight': '70', 'height': '175'}
+    client.post('/generate', data=form)  # warm up templates and catalog
+    start = time.perf_counter()
+    for _ in range(total):
+        response = client.post('/generate', data=form)
+        assert response.status_code == 200
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    current_output, current_cache = fitai.output, fitai.plan_cache
+    fitai.plan_cache = PlanCache(max_entries=0)  # Measure generation, not cache hits
+    try:
+        with fitai.app.test_client() as client:
+            fitai.output = legacy_output
+            try:
+                before = requests_per_second(client, args.requests)
+            finally:
+                fitai.output = current_output
+            after = requests_per_second(client, args.requests)
+    finally:
+        fitai.plan_cache = current_cache
+
+    print(f"POST /generate, {args.requests} requests")
+    print(f"  before (pandas per request): {before:10.1f} req/s")
+    print(f"  after  (in-memory catalog):  {after:10.1f} req/s")
+    print(f"  speedup: {after / before:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
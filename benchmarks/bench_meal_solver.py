@@ -0,0 +1,67 @@
+"""
+Benchmark the calorie/macro meal solver on a synthetic catalog.
+
+The real diet_data.csv is tiny, so a catalog of ``--foods`` random items is
+generated in the same format to show how a day's solve scales. Reports
+milliseconds per day and the share of days that land within tolerance.
+
+Usage:
+    python benchmarks/bench_meal_solver.py [--foods 5000] [--days 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from catalogs import MEAL_TYPES, DietIndex
+from meal_solver import MealSolver, macro_split
+
+
+def synthetic_catalog(foods, seed=0):
+    rng = np.random.default_rng(seed)
+    protein = rng.uniform(0, 60, foods).round()
+    fats = rng.uniform(0, 40, foods).round()
+    carbs = rng.uniform(0, 120, foods).round()
+    return pd.DataFrame({
+        'food_item': [f'Food {i}' for i in range(foods)],
+        'meal_type': rng.choice(MEAL_TYPES, foods),
+        'calories': (4 * protein + 9 * fats + 4 * carbs).astype(int),
+        'protein': protein, 'fats': fats, 'carbs': carbs,
+        'diet_type': rng.choice(['weight_loss', 'weight_gain', 'maintenance'], foods),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--foods', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=200)
+    args = parser.parse_args()
+
+    index = DietIndex.from_frame(synthetic_catalog(args.foods))
+    start = time.perf_counter()
+    solver = MealSolver(index, 'weight_loss', macro_split('weight loss'))
+    print(f"{args.foods} foods, candidate tables built in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = np.random.default_rng(1)
+    targets = rng.uniform(1200, 3200, args.days)
+    within = 0
+    previous = ()
+    times = []
+    for target in targets:
+        start = time.perf_counter()
+        solution = solver.solve(target, rng, previous)
+        previous = [solution.rows]
+        times.append(time.perf_counter() - start)
+        within += solution.within_tolerance
+    times.sort()
+    print(f"  {args.days} days: median {times[len(times) // 2] * 1000:.2f} ms, "
+          f"p99 {times[int(len(times) * 0.99)] * 1000:.2f} ms, {within / args.days:.0%} within tolerance")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Measure cold start: import cost per module and time to the first /health.
+
+Each measurement runs in a fresh interpreter, the way a new gunicorn
+worker starts. ``python -X importtime`` gives the cumulative import time of
+app and its heaviest dependencies. Time to first /health covers
+``import app`` and one request through the test client. The run fails if
+the median exceeds ``--target-ms`` or a deferred module is imported eagerly.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--target-ms 500]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Time to first /health, budgeted for Render's free instances
+TARGET_MS = 500
+
+# Heavy modules app.py should only import once a route needs them
+DEFERRED_MODULES = ('pandas', 'numpy', 'google.generativeai', 'google.api_core', 'requests')
+
+FIRST_HEALTH = """
+import time
+start = time.perf_counter()
+import app
+with app.app.test_client() as client:
+    assert client.get('/health').status_code == 200
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def _env():
+    # No warm-up thread and no real key, so nothing but the import is timed
+    env = dict(os.environ, WARMUP='0', PYTHONDONTWRITEBYTECODE='1')
+    env.pop('GEMINI_API_KEY', None)
+    return env
+
+
+def import_times():
+    """``{module: cumulative import milliseconds}`` for a fresh ``import app``."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=ROOT, env=_env(), capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def first_health_ms():
+    """Milliseconds from ``import app`` to the first /health response, in a fresh interpreter."""
+    result = subprocess.run([sys.executable, '-c', FIRST_HEALTH],
+                            cwd=ROOT, env=_env(), capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--target-ms', type=float, default=TARGET_MS)
+    args = parser.parse_args()
+
+    times = import_times()
+    print("import app (python -X importtime, cumulative)")
+    print(f"  {'app':<28}{times['app']:8.1f} ms")
+    for name in sorted(times, key=times.get, reverse=True)[:10]:
+        if name != 'app':
+            print(f"  {name:<28}{times[name]:8.1f} ms")
+    eager = [name for name in DEFERRED_MODULES if name in times]
+    print(f"  deferred modules imported eagerly: {', '.join(eager) or 'none'}")
+
+    samples = sorted(first_health_ms() for _ in range(args.runs))
+    median = statistics.median(samples)
+    print(f"\ntime to first /health, {args.runs} fresh interpreters")
+    print(f"  median {median:.1f} ms, best {samples[0]:.1f} ms, worst {samples[-1]:.1f} ms"
+          f"  (target {args.target_ms:g} ms)")
+    if median > args.target_ms or eager:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Timing, reporting and baseline comparison for the benchmark suite.
+
+Each case is called repeatedly for a fixed time budget after a short
+warm-up. Every call is timed on its own, so the report has throughput and
+latency percentiles side by side. Results can be saved as a JSON baseline
+and later runs compared against it: a case regresses when its throughput
+drops by more than the threshold.
+"""
+import json
+import platform
+import time
+from collections import namedtuple
+
+Result = namedtuple('Result', 'name ops ops_per_sec mean_us p50_us p90_us p99_us')
+
+
+def percentile(samples, q):
+    """``q``-th percentile (0-100) of already sorted ``samples``, nearest rank."""
+    index = min(len(samples) - 1, max(0, int(round(q / 100 * len(samples))) - 1))
+    return samples[index]
+
+
+def measure(name, fn, min_time=0.5, warmup=3, min_ops=20, max_ops=200000):
+    """Run ``fn`` for at least ``min_time`` seconds and ``min_ops`` calls."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    clock = time.perf_counter
+    deadline = clock() + min_time
+    while len(samples) < max_ops and (len(samples) < min_ops or clock() < deadline):
+        start = clock()
+        fn()
+        samples.append(clock() - start)
+    total = sum(samples)
+    samples.sort()
+    return Result(
+        name=name,
+        ops=len(samples),
+        ops_per_sec=len(samples) / total if total else float('inf'),
+        mean_us=total / len(samples) * 1e6,
+        p50_us=percentile(samples, 50) * 1e6,
+        p90_us=percentile(samples, 90) * 1e6,
+        p99_us=percentile(samples, 99) * 1e6,
+    )
+
+
+def format_table(results, baseline=None):
+    lines = [f"{'case':<34}{'ops/s':>12}{'p50 us':>11}{'p90 us':>11}{'p99 us':>11}{'vs base':>10}"]
+    for result in results:
+        change = ''
+        if baseline and result.name in baseline:
+            change = f"{result.ops_per_sec / baseline[result.name]['ops_per_sec'] - 1:+.0%}"
+        lines.append(f"{result.name:<34}{result.ops_per_sec:>12.1f}{result.p50_us:>11.1f}"
+                     f"{result.p90_us:>11.1f}{result.p99_us:>11.1f}{change:>10}")
+    return '\n'.join(lines)
+
+
+def save_baseline(path, results):
+    data = {
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': {result.name: result._asdict() for result in results},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def regressions(results, baseline, threshold):
+    """``(name, ratio)`` for every case whose ops/sec fell more than ``threshold`` (0.2 = 20%)."""
+    slower = []
+    for result in results:
+        if result.name in baseline:
+            ratio = result.ops_per_sec / baseline[result.name]['ops_per_sec']
+            if ratio < 1 - threshold:
+                slower.append((result.name, ratio))
+    return slower
@@ -0,0 +1,221 @@
+"""
+Offline benchmark suite for the plan generators and every Flask route.
+
+Runs without a server or a Gemini key: the Gemini SDK is replaced by a stub
+model that answers instantly, so the route numbers measure our own code
+(FAQ lookup, caching, admission control, rendering) and not the network.
+Cold start (time to the first /health in a fresh interpreter) is measured
+too; see bench_startup.py for the import-time breakdown.
+
+Usage:
+    python benchmarks/suite.py                          # run and print
+    python benchmarks/suite.py --save baseline.json     # record a baseline
+    python benchmarks/suite.py --baseline baseline.json # fail on >20% regressions
+    python benchmarks/suite.py -k diet --min-time 2     # subset, longer runs
+
+Baselines only make sense on the machine that recorded them.
+"""
+import argparse
+import io
+import itertools
+import os
+import sys
+import tempfile
+import time
+import types
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Settings have to be in place before app is imported: a stub key, no rate
+# limiting, and nothing written outside the temp dir
+os.environ['GEMINI_API_KEY'] = 'offline-benchmark'
+os.environ['AI_RATE_PER_MINUTE'] = '1000000000'
+os.environ['AI_RATE_BURST'] = '1000000000'
+os.environ.pop('AI_CACHE_PATH', None)
+os.environ['CERT_JOB_DB'] = os.path.join(tempfile.mkdtemp(prefix='fitai-bench-'), 'jobs.sqlite3')
+
+import ai_client
+import bench_startup
+from harness import format_table, load_baseline, measure, regressions, save_baseline
+
+
+class StubModel:
+    """Stands in for ``genai.GenerativeModel`` with canned, instant answers."""
+
+    ANSWER = "Try 3 sets of 10 goblet squats, 3 sets of 8 push-ups and a 20 minute walk."
+
+    def __init__(self, model_name, system_instruction=None):
+        pass
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if stream:
+            return iter(types.SimpleNamespace(text=word + ' ') for word in self.ANSWER.split())
+        return types.SimpleNamespace(text=self.ANSWER)
+
+
+ai_client.genai.configure = lambda **kwargs: None
+ai_client.genai.GenerativeModel = StubModel
+
+import app as fitai
+from bench_diet import batch_profiles
+from health_conditions import detect_health_conditions_from_text
+
+STARTUP_CASE = 'startup: first /health'
+PROFILE = (30, 175, 70, 'weight loss', 4, 'weight loss', 'female', 'moderate', ['Diabetes'])
+DIET_FORM = {
+    'age': '30', 'height': '175', 'weight': '70', 'goal': 'weight loss', 'duration': '4',
+    'diet_type': 'vegetarian', 'gender': 'female', 'activity_level': 'moderate',
+    'health_conditions': '["Diabetes"]',
+}
+DIET_PROFILE = dict(DIET_FORM, health_conditions=['Diabetes'], duration='12')
+CERTIFICATE = (
+    "Patient reviewed on 12/03. History of type 2 diabetes, managed with metformin. "
+    "BP 150/95, started on amlodipine for hypertension. Adrenal panel normal, resting 64 bpm. "
+) * 40
+DOCX_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+    + '<w:p><w:r><w:t>History of asthma and high blood pressure.</w:t></w:r></w:p>' * 200
+    + '</w:body></w:document>'
+)
+
+
+def make_docx():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('word/document.xml', DOCX_XML)
+    return buffer.getvalue()
+
+
+def function_cases():
+    return [
+        ('calculate_intensity', lambda: fitai.calculate_intensity(70, 175)),
+        ('output', lambda: fitai.output(70)),
+        ('WeeklyDietPlan', lambda: fitai.WeeklyDietPlan(*PROFILE).plan),
+        ('detect_health_conditions', lambda: detect_health_conditions_from_text(CERTIFICATE)),
+    ]
+
+
+def route_cases(client):
+    """One case per route; the set is checked against app.url_map."""
+    # Every AI question is new, so each request reaches the (stub) model
+    # instead of the response cache
+    counter = itertools.count()
+    docx = make_docx()
+    batch = batch_profiles(100)
+    plan_id = client.post('/api/diet/plan', json=DIET_PROFILE).get_json()['plan_id']
+
+    def expect(response, status=200):
+        assert response.status_code == status, (response.status_code, response.get_data(as_text=True)[:200])
+        return response
+
+    def get(path):
+        return lambda: expect(client.get(path))
+
+    def ask(path, key):
+        return lambda: expect(client.post(path, json={key: f"plan a deload week {next(counter)} for my powerlifting block"}))
+
+    def chat_stream():
+        response = expect(client.post('/api/chat/stream',
+                                      json={'message': f"plan a deload week {next(counter)} for my powerlifting block"}))
+        response.get_data()
+        response.close()  # releases the AI slot, as the WSGI server would
+
+    def upload(data, filename, status):
+        return expect(client.post('/upload_medical_certificate',
+                                  data={'medical_certificate': (io.BytesIO(data), filename)},
+                                  content_type='multipart/form-data'), status)
+
+    def docx_job():
+        job_id = upload(docx, 'note.docx', 202).get_json()['job_id']
+        while client.get(f'/upload_medical_certificate/jobs/{job_id}').get_json()['status'] == 'pending':
+            time.sleep(0.001)
+
+    job_id = upload(docx, 'note.docx', 202).get_json()['job_id']
+
+    return [
+        ('GET /health', '/health', get('/health')),
+        ('GET /metrics', '/metrics', get('/metrics')),
+        ('GET /', '/', get('/')),
+        ('GET /gen', '/gen', get('/gen')),
+        ('POST /generate', '/generate', lambda: expect(client.post('/generate', data={'weight': '70', 'height': '175'}))),
+        ('POST /api/routine', '/api/routine',
+         lambda: expect(client.post('/api/routine', json={'weight': 70, 'height': 175}))),
+        ('GET /diet', '/diet', get('/diet')),
+        ('POST /diet', '/diet', lambda: expect(client.post('/diet', data=DIET_FORM))),
+        ('POST /api/diet/plan', '/api/diet/plan', lambda: expect(client.post('/api/diet/plan', json=DIET_PROFILE))),
+        ('GET /api/diet/plan week 12', '/api/diet/plan/<plan_id>', get(f'/api/diet/plan/{plan_id}?week=12')),
+        ('GET /api/diet/swap', '/api/diet/swap', get('/api/diet/swap?food=Scrambled%20Eggs&k=3')),
+        ('POST /api/diet/batch (100 plans)', '/api/diet/batch',
+         lambda: expect(client.post('/api/diet/batch', json=batch))),
+        ('GET /sport', '/sport', get('/sport')),
+        ('POST /sport', '/sport', lambda: expect(client.post('/sport', data={'fitness_level': 'beginner'}))),
+        ('GET /workout', '/workout', get('/workout')),
+        ('GET /GP', '/GP', get('/GP')),
+        ('GET /D1', '/D1', get('/D1')),
+        ('GET /D2', '/D2', get('/D2')),
+        ('GET /D3', '/D3', get('/D3')),
+        ('GET /D4', '/D4', get('/D4')),
+        ('GET /ai-coach', '/ai-coach', get('/ai-coach')),
+        ('GET /ai_query', '/ai_query', get('/ai_query')),
+        ('POST /api/ai_query', '/api/ai_query', ask('/api/ai_query', 'user_prompt')),
+        ('POST /api/chat', '/api/chat', ask('/api/chat', 'message')),
+        ('POST /api/chat (FAQ)', '/api/chat',
+         lambda: expect(client.post('/api/chat', json={'message': 'How much protein should I eat?'}))),
+        ('POST /api/chat/stream', '/api/chat/stream', chat_stream),
+        ('POST upload (txt)', '/upload_medical_certificate',
+         lambda: upload(CERTIFICATE.encode('utf-8'), 'note.txt', 200)),
+        ('POST upload (docx job)', '/upload_medical_certificate', docx_job),
+        ('GET upload job status', '/upload_medical_certificate/jobs/<job_id>',
+         get(f'/upload_medical_certificate/jobs/{job_id}')),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-k', dest='match', default='', help="only run cases whose name contains this")
+    parser.add_argument('--min-time', type=float, default=0.5, help="seconds per case (default 0.5)")
+    parser.add_argument('--save', metavar='PATH', help="write the results as a JSON baseline")
+    parser.add_argument('--baseline', metavar='PATH', help="compare against a saved baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed ops/sec drop before failing (default 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    with fitai.app.test_client() as client:
+        routes = route_cases(client)
+        covered = {rule for _, rule, _ in routes}
+        missing = sorted(rule.rule for rule in fitai.app.url_map.iter_rules()
+                         if rule.endpoint != 'static' and rule.rule not in covered)
+        if missing:
+            print(f"warning: no benchmark for {', '.join(missing)}", file=sys.stderr)
+
+        cases = function_cases() + [(name, fn) for name, _, fn in routes]
+        results = [measure(name, fn, min_time=args.min_time)
+                   for name, fn in cases if args.match.lower() in name.lower()]
+
+    # Cold start: a fresh interpreter importing app and answering /health
+    if args.match.lower() in STARTUP_CASE.lower():
+        results.append(measure(STARTUP_CASE, bench_startup.first_health_ms, min_time=0, warmup=0, min_ops=5))
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    print(format_table(results, baseline))
+
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"\nbaseline saved to {args.save}")
+
+    if baseline:
+        slower = regressions(results, baseline, args.threshold)
+        if slower:
+            print(f"\nregressions beyond {args.threshold:.0%}:", file=sys.stderr)
+            for name, ratio in slower:
+                print(f"  {name}: {ratio - 1:+.0%} ops/s", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nno regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
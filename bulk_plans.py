@@ -0,0 +1,182 @@
+"""
+Regenerate workout routines and diet plans for a whole member export.
+
+Reads a CSV of profiles as a stream and writes one JSON object per member
+(JSONL) as results come in. Rows are handed out in chunks to a
+``multiprocessing`` pool. The catalogs are loaded once in the parent
+before the pool forks, so every worker shares them copy-on-write instead
+of parsing its own. At most a few chunks per worker are in flight, which
+keeps memory flat however long the input is.
+
+Each plan is built by the same code as the web app (``calculate_intensity``,
+``output()`` and ``WeeklyDietPlan`` from ``plans``), seeded from the profile
+like /generate and /diet, so a member gets the same plan here as on the
+site. The Flask app itself is never imported: its logging thread,
+background jobs and SQLite handles must not be forked into the workers.
+
+Expected columns: age, height, weight, goal, diet_type, gender,
+activity_level, plus optional id, duration and health_conditions
+(separated by ``;``).
+
+Usage:
+    python bulk_plans.py members.csv -o plans.jsonl [--workers 8] [--chunk-size 500] [--unordered]
+    python bulk_plans.py - < members.csv > plans.jsonl
+"""
+import argparse
+import collections
+import csv
+import gc
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+
+from catalogs import diet_catalog, exercise_catalog
+from plan_cache import plan_seed
+from plans import WeeklyDietPlan, calculate_intensity, output
+
+CHUNK_SIZE = 500
+# Chunks queued per worker: enough to keep them busy, few enough to bound memory
+IN_FLIGHT_PER_WORKER = 2
+
+
+def plan_for_row(row):
+    """JSON-ready routine and diet plan for one CSV row; raises ValueError on bad input."""
+    try:
+        age = int(row['age'])
+        height = float(row['height'])
+        weight = float(row['weight'])
+        duration = int(row.get('duration') or 4)
+        goal, diet_type, gender, activity_level = (
+            row['goal'], row['diet_type'], row['gender'], row['activity_level'])
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"missing column {e}") from None
+    if height <= 0 or weight <= 0:
+        raise ValueError("height and weight must be positive")
+    health_conditions = [c.strip() for c in (row.get('health_conditions') or '').split(';') if c.strip()]
+
+    intensity = calculate_intensity(weight, height)
+    diet_profile = (age, height, weight, goal, duration, diet_type, gender, activity_level)
+    diet = WeeklyDietPlan(age, height, weight, goal, duration, diet_type, gender, activity_level,
+                          health_conditions, seed=plan_seed(diet_profile))
+    return {
+        'intensity': intensity,
+        'routine': output(intensity, random.Random(plan_seed((weight, height)))),
+        'bmr': diet.bmr,
+        'daily_calories': diet.daily_calories,
+        'diet': diet.plan,
+    }
+
+
+def plan_chunk(rows):
+    """Worker task: ``[(line, row), ...]`` to ``(JSONL text, errors)``."""
+    lines = []
+    errors = 0
+    for line, row in rows:
+        record = {'id': row.get('id') or None, 'line': line}
+        try:
+            record.update(plan_for_row(row))
+        except ValueError as e:
+            record['error'] = str(e)
+            errors += 1
+        lines.append(json.dumps(record) + '\n')
+    return ''.join(lines), errors
+
+
+def read_chunks(stream, chunk_size):
+    """``(line, row)`` chunks from a CSV stream, read lazily."""
+    rows = enumerate(csv.DictReader(stream), start=2)  # line 1 is the header
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _ordered(pool, chunks, window):
+    pending = collections.deque()
+    for chunk in chunks:
+        if len(pending) >= window:
+            yield pending.popleft().get()
+        pending.append(pool.apply_async(plan_chunk, (chunk,)))
+    while pending:
+        yield pending.popleft().get()
+
+
+def _unordered(pool, chunks, window):
+    # Each result (or worker exception) lands on the queue as it completes
+    done = queue.Queue()
+
+    def take():
+        result = done.get()
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    in_flight = 0
+    for chunk in chunks:
+        if in_flight >= window:
+            yield take()
+            in_flight -= 1
+        pool.apply_async(plan_chunk, (chunk,), callback=done.put, error_callback=done.put)
+        in_flight += 1
+    for _ in range(in_flight):
+        yield take()
+
+
+def run(source, destination, workers=None, chunk_size=CHUNK_SIZE, ordered=True):
+    """Plan every row of ``source`` into ``destination``; returns ``(rows, errors)``."""
+    workers = workers or os.cpu_count() or 1
+    # Load in the parent so forked workers inherit the catalogs (and the
+    # precomputed routine skeletons); freezing keeps the garbage collector
+    # from touching, and so copying, those pages in every child
+    exercise_catalog.get()
+    diet_catalog.get()
+    gc.freeze()
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    rows = errors = 0
+    with context.Pool(workers) as pool:
+        gc.unfreeze()  # The workers have forked; the parent can collect normally again
+        window = workers * IN_FLIGHT_PER_WORKER
+        results = (_ordered if ordered else _unordered)(pool, read_chunks(source, chunk_size), window)
+        for text, chunk_errors in results:
+            destination.write(text)
+            rows += text.count('\n')
+            errors += chunk_errors
+    return rows, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('profiles', help="CSV file of member profiles, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSONL file to write (default stdout)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help=f"rows per task (default {CHUNK_SIZE})")
+    parser.add_argument('--unordered', action='store_true',
+                        help="write chunks as they finish instead of in input order")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.profiles == '-' else open(args.profiles, newline='', encoding='utf-8')
+    destination = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    start = time.perf_counter()
+    try:
+        rows, errors = run(source, destination, args.workers, args.chunk_size, ordered=not args.unordered)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if destination is not sys.stdout:
+            destination.close()
+    elapsed = time.perf_counter() - start
+    print(f"{rows} plans ({errors} rejected rows) in {elapsed:.1f}s, {rows / elapsed:.0f} plans/s",
+          file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
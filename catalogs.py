@@ -0,0 +1,236 @@
+"""
+In-memory catalogs built from the CSV datasets shipped with FitAI.
+
+The CSV files are parsed once per process and turned into compact,
+read-only indexes so request handlers never touch pandas. A catalog is
+rebuilt only when the file's mtime changes on disk.
+"""
+import math
+import os
+import random
+import threading
+from types import MappingProxyType
+
+from lazy_imports import LazyModule
+
+# Loaded when the first catalog is built, not at import, to keep cold starts fast
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EXERCISES_CSV = os.path.join(BASE_DIR, 'exercises.csv')
+DIET_CSV = os.path.join(BASE_DIR, 'diet_data.csv')
+
+MEAL_TYPES = ('Breakfast', 'Mid-Morning', 'Lunch', 'Afternoon Snack', 'Dinner', 'Before Bed')
+
+# Routine sections with their share of the intensity budget
+ROUTINE_SECTIONS = (('warmup', 0.2), ('exercise', 0.6), ('cooldown', 0.2))
+# Every value calculate_intensity() can return
+INTENSITY_LEVELS = (40, 50, 60, 70)
+
+_meal_rng = None
+
+
+def meal_rng(seed=None):
+    """Generator for meal sampling: a fresh one for ``seed``, else the shared one.
+
+    numpy serialises access to the shared generator internally.
+    """
+    global _meal_rng
+    if seed is not None:
+        return np.random.default_rng(seed)
+    if _meal_rng is None:
+        _meal_rng = np.random.default_rng()
+    return _meal_rng
+
+
+class CsvCatalog:
+    """Lazily parses a CSV file and caches the index built from it."""
+
+    def __init__(self, path, build):
+        self.path = path
+        self._build = build
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._index = None
+
+    def get(self):
+        """Return the current index, rebuilding it if the file changed."""
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    self._index = self._build(pd.read_csv(self.path))
+                    self._mtime = mtime
+        return self._index
+
+    def version(self):
+        """Identifies the current contents; changes whenever the file is reloaded."""
+        self.get()
+        return self._mtime
+
+
+class ExerciseIndex:
+    """Exercises grouped by category as (name, reps_min, reps_max) tuples.
+
+    ``reps_min``/``reps_max`` are ``None`` for duration-based exercises.
+    """
+
+    def __init__(self, by_category):
+        self.by_category = by_category
+        # The exercises in a routine depend only on the intensity, so the
+        # structure for each level is worked out once per catalog load
+        self.skeletons = {level: RoutineSkeleton(self, level) for level in INTENSITY_LEVELS}
+
+    @classmethod
+    def from_frame(cls, df):
+        by_category = {}
+        for name, category, reps_min, reps_max in zip(
+                df['exercise_name'], df['category'], df['reps_min'], df['reps_max']):
+            if pd.notnull(reps_min) and pd.notnull(reps_max):
+                entry = (name, int(reps_min), int(reps_max))
+            else:
+                entry = (name, None, None)
+            by_category.setdefault(category, []).append(entry)
+        return cls({category: tuple(rows) for category, rows in by_category.items()})
+
+    def take(self, category, max_intensity):
+        """Return the leading exercises of a category that fit under ``max_intensity``.
+
+        Each exercise counts as one towards the total, and an exercise is
+        only included while the running count stays below ``max_intensity``.
+        """
+        count = max(0, math.ceil(max_intensity) - 1)
+        return self.by_category.get(category, ())[:count]
+
+
+    def skeleton(self, intensity):
+        """Routine structure for ``intensity``, precomputed for the standard levels."""
+        skeleton = self.skeletons.get(intensity)
+        return skeleton if skeleton is not None else RoutineSkeleton(self, intensity)
+
+
+class RoutineSkeleton:
+    """The exercises of a routine at one intensity; only the rep counts vary.
+
+    ``sections`` is a tuple of ``(category, rows)`` with rows as in
+    ``ExerciseIndex.by_category``.
+    """
+
+    def __init__(self, exercises, intensity):
+        self.intensity = intensity
+        self.sections = tuple(
+            (category, exercises.take(category, intensity * ratio)) for category, ratio in ROUTINE_SECTIONS)
+        # (line prefix, reps_min, reps_max) in routine order, ready for output()
+        self._lines = tuple(
+            (f"{name} - ", reps_min, reps_max) for _, rows in self.sections for name, reps_min, reps_max in rows)
+
+    def lines(self, rng=random):
+        """The routine as display lines, drawing reps from ``rng`` in order."""
+        return [f"{prefix}{rng.randint(reps_min, reps_max)} reps" if reps_min is not None
+                else f"{prefix}Duration-based"
+                for prefix, reps_min, reps_max in self._lines]
+
+    def to_dict(self, rng=random):
+        """The routine as JSON-ready sections of exercises."""
+        sections = []
+        for category, rows in self.sections:
+            items = []
+            for name, reps_min, reps_max in rows:
+                if reps_min is not None:
+                    items.append({'name': name, 'reps': rng.randint(reps_min, reps_max),
+                                  'reps_min': reps_min, 'reps_max': reps_max, 'duration_based': False})
+                else:
+                    items.append({'name': name, 'reps': None, 'duration_based': True})
+            sections.append({'category': category, 'exercises': items})
+        return {'intensity': self.intensity, 'sections': sections}
+
+
+exercise_catalog = CsvCatalog(EXERCISES_CSV, ExerciseIndex.from_frame)
+
+
+def _frozen(array):
+    array.setflags(write=False)
+    return array
+
+
+class DietIndex:
+    """Meal labels indexed by ``(diet_type, meal_type)``.
+
+    Every key holds a read-only array of row indexes into ``labels``, so a
+    whole week of meals can be drawn with a single vectorized RNG call.
+    Keys with ``None`` in place of the diet or meal type are fallback pools
+    used when the dataset has no rows for an exact combination. The raw
+    columns are kept as read-only arrays, with ``nutrients`` holding
+    calories, protein, fats and carbs per row.
+    """
+
+    NUTRIENTS = ('calories', 'protein', 'fats', 'carbs')
+
+    def __init__(self, labels, pools, food_items, meal_types, diet_types, nutrients):
+        self.labels = labels
+        self.pools = pools
+        self.food_items = food_items
+        self.meal_types = meal_types
+        self.diet_types = diet_types
+        self.nutrients = nutrients
+
+    @classmethod
+    def from_frame(cls, df):
+        labels = _frozen(np.array(
+            [f"{food} - {calories} calories" for food, calories in zip(df['food_item'], df['calories'])],
+            dtype=object,
+        ))
+        pools = {(None, None): np.arange(len(df))}
+        for key, rows in df.groupby(['diet_type', 'meal_type']).indices.items():
+            pools[key] = rows
+        for diet_type, rows in df.groupby('diet_type').indices.items():
+            pools[(diet_type, None)] = rows
+        for meal_type, rows in df.groupby('meal_type').indices.items():
+            pools[(None, meal_type)] = rows
+        pools = {key: _frozen(np.asarray(rows, dtype=np.intp)) for key, rows in pools.items()}
+        return cls(
+            labels,
+            MappingProxyType(pools),
+            food_items=_frozen(df['food_item'].to_numpy(dtype=object)),
+            meal_types=_frozen(df['meal_type'].to_numpy(dtype=object)),
+            diet_types=_frozen(df['diet_type'].to_numpy(dtype=object)),
+            nutrients=_frozen(df[list(cls.NUTRIENTS)].to_numpy(dtype=float)),
+        )
+
+    def pool(self, diet_type, meal_type, allowed=None):
+        """Row indexes for a meal slot, widening the match if nothing fits exactly.
+
+        With an ``allowed`` mask only those rows count, unless none are allowed at all.
+        """
+        for key in ((diet_type, meal_type), (None, meal_type), (diet_type, None), (None, None)):
+            rows = self.pools.get(key)
+            if rows is not None and allowed is not None:
+                rows = rows[allowed[rows]]
+            if rows is not None and len(rows):
+                return rows
+        if allowed is not None:
+            return self.pool(diet_type, meal_type)
+        raise ValueError("diet catalog is empty")
+
+    def within_limits(self, limits):
+        """Mask of the rows with at most ``limits[nutrient]`` grams of each nutrient."""
+        mask = np.ones(len(self.labels), dtype=bool)
+        for nutrient, most in limits.items():
+            mask &= self.nutrients[:, self.NUTRIENTS.index(nutrient)] <= most
+        return mask
+
+    def sample_days(self, diet_type, days, meal_types=MEAL_TYPES, rng=None):
+        """Pick one meal label per meal type for each day.
+
+        Returns a ``days x len(meal_types)`` array of labels drawn with one
+        call to the random generator.
+        """
+        pools = [self.pool(diet_type, meal_type) for meal_type in meal_types]
+        sizes = np.array([len(rows) for rows in pools])
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        picks = (rng or meal_rng()).integers(0, sizes, size=(days, len(meal_types)))
+        return self.labels[np.concatenate(pools)[offsets + picks]]
+
+
+diet_catalog = CsvCatalog(DIET_CSV, DietIndex.from_frame)
@@ -0,0 +1,341 @@
+"""
+Background text extraction for PDF and DOCX medical certificates.
+
+Parsing a PDF or DOCX is CPU-heavy, so it doesn't happen on a gunicorn
+request thread. The upload is spooled to a temporary file, a job id is
+returned straight away, and a small process pool extracts the text and
+detects health conditions. Every job runs under a CPU-time limit and a
+wall-clock deadline; a job past its deadline is marked failed and gives
+up its pending slot even if its process is stuck. Job state lives in a SQLite file in the temp directory, so a browser polling
+for the result can land on any gunicorn worker on the host.
+
+DOCX is read with the standard library (it is a zip of XML). PDF needs the
+optional ``pypdf`` package; without it PDF jobs fail with a clear message.
+
+Configuration comes from the environment:
+
+``CERT_JOB_WORKERS``      extraction processes per gunicorn worker (default 1)
+``CERT_JOB_MAX_PENDING``  queued + running jobs before uploads get a 503 (default 8)
+``CERT_JOB_CPU_SECONDS``  CPU time allowed per job (default 20)
+``CERT_JOB_WALL_SECONDS`` seconds from upload until a job is given up (default 60)
+``CERT_JOB_TTL``          seconds a finished job's result is kept (default 600)
+``CERT_JOB_DB``           path of the shared job table (default in the temp dir)
+"""
+import json
+import multiprocessing
+import os
+import secrets
+import signal
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from admission import Overloaded
+from health_conditions import order_conditions, scan_health_conditions_stream
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_JOB_ID_LENGTH = 22
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+TOO_SLOW = "The document took too long to process."
+
+
+class ExtractionError(Exception):
+    """The document could not be read; the message is shown to the user."""
+
+
+def iter_docx_text(path):
+    """Yield the paragraphs of a DOCX file, parsing its XML incrementally."""
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        raise ExtractionError("The DOCX file is damaged or not a Word document.")
+    with archive, archive.open('word/document.xml') as document:
+        parts = []
+        for _, element in ElementTree.iterparse(document):
+            if element.tag == _WORD_NS + 't':
+                parts.append(element.text or '')
+            elif element.tag in (_WORD_NS + 'tab', _WORD_NS + 'br'):
+                parts.append(' ')
+            elif element.tag == _WORD_NS + 'p':
+                yield ''.join(parts) + '\n'
+                parts = []
+                element.clear()
+
+
+def iter_pdf_text(path):
+    """Yield the text of a PDF one page at a time (needs ``pypdf``)."""
+    try:
+        from pypdf import PdfReader
+        from pypdf.errors import PdfReadError
+    except ImportError:
+        raise ExtractionError("PDF support is not installed. Please upload a DOCX or TXT file.")
+    try:
+        reader = PdfReader(path)
+        for page in reader.pages:
+            yield (page.extract_text() or '') + '\n'
+    except PdfReadError:
+        raise ExtractionError("The PDF file is damaged or encrypted.")
+
+
+EXTRACTORS = {
+    'docx': iter_docx_text,
+    'pdf': iter_pdf_text,
+}
+
+
+class _LimitExceeded(Exception):
+    pass
+
+
+def _raise_limit(signum, frame):
+    raise _LimitExceeded()
+
+
+def _limit_cpu(seconds):
+    """Make SIGXCPU fire once this process has used ``seconds`` more CPU time."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    previous = resource.getrlimit(resource.RLIMIT_CPU)
+    signal.signal(signal.SIGXCPU, _raise_limit)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, previous[1]))
+    return previous
+
+
+def _limit_wall_time(seconds):
+    """Make SIGALRM fire after ``seconds``, so a job waiting rather than computing stops too."""
+    if seconds is None or not hasattr(signal, 'setitimer'):
+        return False
+    signal.signal(signal.SIGALRM, _raise_limit)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    return True
+
+
+def extract_conditions(path, extension, cpu_seconds, wall_seconds=None):
+    """Job body, run in a pool process: the conditions found in the document."""
+    previous = _limit_cpu(cpu_seconds)
+    alarm = _limit_wall_time(wall_seconds)
+    try:
+        matches = scan_health_conditions_stream(EXTRACTORS[extension](path))
+        return order_conditions(match.condition for match in matches)
+    except _LimitExceeded:
+        raise ExtractionError(TOO_SLOW)
+    except (KeyError, ElementTree.ParseError):
+        raise ExtractionError(f"The {extension.upper()} file is damaged or not supported.")
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if previous is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, previous)
+
+
+class JobTable:
+    """Job states shared by every process on the host through SQLite."""
+
+    def __init__(self, path, ttl=600.0, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self._clock = clock
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, '
+                'conditions TEXT, error TEXT, updated REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    def create(self):
+        job_id = secrets.token_urlsafe(16)
+        now = self._clock()
+        with self._connect() as db:
+            db.execute('DELETE FROM jobs WHERE updated < ?', (now - self.ttl,))
+            db.execute('INSERT INTO jobs VALUES (?, ?, NULL, NULL, ?)', (job_id, PENDING, now))
+        return job_id
+
+    def finish(self, job_id, conditions=None, error=None):
+        status = FAILED if error else DONE
+        with self._connect() as db:
+            db.execute(
+                'UPDATE jobs SET status = ?, conditions = ?, error = ?, updated = ? WHERE id = ?',
+                (status, json.dumps(conditions) if conditions is not None else None, error,
+                 self._clock(), job_id),
+            )
+
+    def get(self, job_id):
+        """``{'status', 'health_conditions', 'error'}`` for a job, or ``None``."""
+        if len(job_id) != _JOB_ID_LENGTH:
+            return None
+        row = self._connect().execute(
+            'SELECT status, conditions, error FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        status, conditions, error = row
+        return {
+            'status': status,
+            'health_conditions': json.loads(conditions) if conditions else [],
+            'error': error,
+        }
+
+
+class CertificateJobs:
+    """Bounded process pool that runs extraction jobs and records their results."""
+
+    def __init__(self, table, workers=1, max_pending=8, cpu_seconds=20.0, wall_seconds=60.0):
+        self.table = table
+        self.workers = workers
+        self.max_pending = max_pending
+        self.cpu_seconds = cpu_seconds
+        self.wall_seconds = wall_seconds
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+        self._pending = 0
+        self._deadlines = {}  # job id -> Timer, for jobs not settled yet
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        # Optional ``on_finish(extension, seconds, ok)`` hook, e.g. for metrics
+        self.on_finish = None
+
+    @classmethod
+    def from_env(cls):
+        path = os.getenv('CERT_JOB_DB') or os.path.join(tempfile.gettempdir(), 'fitai_certificate_jobs.sqlite3')
+        return cls(
+            JobTable(path, ttl=float(os.getenv('CERT_JOB_TTL', '600'))),
+            workers=int(os.getenv('CERT_JOB_WORKERS', '1')),
+            max_pending=int(os.getenv('CERT_JOB_MAX_PENDING', '8')),
+            cpu_seconds=float(os.getenv('CERT_JOB_CPU_SECONDS', '20')),
+            wall_seconds=float(os.getenv('CERT_JOB_WALL_SECONDS', '60')),
+        )
+
+    def _executor(self):
+        # One pool per process; "spawn" because forking a threaded gunicorn
+        # worker can copy held locks into the child
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def submit(self, chunks, extension):
+        """Spool ``chunks`` to disk and queue an extraction job; returns the job id.
+
+        Raises ``Overloaded`` when too many jobs are already waiting.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise Overloaded("Too many certificates are being processed. Please try again shortly.",
+                                 retry_after=5)
+            self._pending += 1
+        started = time.perf_counter()
+        spool = tempfile.NamedTemporaryFile(suffix='.' + extension, delete=False)
+        try:
+            with spool:
+                for chunk in chunks:
+                    spool.write(chunk)
+            job_id = self.table.create()
+            deadline = threading.Timer(self.wall_seconds, self._expire, (job_id, extension, started))
+            deadline.daemon = True
+            with self._lock:
+                # The job's own alarm counts from when it starts running, so
+                # a queued job is still given up on here on time
+                future = self._executor().submit(
+                    extract_conditions, spool.name, extension, self.cpu_seconds, self.wall_seconds)
+                self._deadlines[job_id] = deadline
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            _remove(spool.name)
+            raise
+        deadline.start()
+        future.add_done_callback(lambda done: self._finish(job_id, spool.name, done, extension, started))
+        return job_id
+
+    def _settle(self, job_id, failed, timed_out=False):
+        """Free the job's pending slot; False if it was already settled."""
+        with self._lock:
+            deadline = self._deadlines.pop(job_id, None)
+            if deadline is None:
+                return False
+            self._pending -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+            if timed_out:
+                self.timed_out += 1
+        deadline.cancel()
+        return True
+
+    def _expire(self, job_id, extension, started):
+        if not self._settle(job_id, failed=True, timed_out=True):
+            return
+        self.table.finish(job_id, error=TOO_SLOW)
+        if self.on_finish is not None:
+            self.on_finish(extension, time.perf_counter() - started, False)
+
+    def _finish(self, job_id, path, future, extension, started):
+        _remove(path)
+        conditions = error = None
+        try:
+            conditions = future.result()
+        except ExtractionError as e:
+            error = str(e)
+        except BrokenProcessPool:
+            # A pool process died (killed for memory, say); start a fresh pool
+            with self._lock:
+                self._pool = None
+            error = "The document could not be processed."
+        except Exception:
+            error = "The document could not be processed."
+        # A job past its deadline has already been reported as failed
+        if not self._settle(job_id, failed=error is not None):
+            return
+        self.table.finish(job_id, conditions=conditions, error=error)
+        if self.on_finish is not None:
+            self.on_finish(extension, time.perf_counter() - started, error is None)
+
+    def get(self, job_id):
+        return self.table.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'completed': self.completed,
+                'failed': self.failed,
+                'timed_out': self.timed_out,
+                'rejected': self.rejected,
+            }
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
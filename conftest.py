@@ -0,0 +1,19 @@
+import pytest
+
+
+class FakeClock:
+    """Stand-in for ``time.monotonic`` / ``time.time`` that only moves when told to."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,176 @@
+"""
+Bounded server-side conversation memory for the AI coach.
+
+Each chat session keeps its most recent exchanges verbatim and folds older
+ones into a short extractive summary. The context sent upstream is
+assembled under a fixed token budget (user profile first, then summary,
+then as many recent turns as fit), so prompt size, and with it Gemini
+latency and cost, stays bounded however long a conversation runs.
+
+Configuration comes from the environment:
+
+``CHAT_MAX_SESSIONS``    sessions kept per worker, LRU evicted (default 1000)
+``CHAT_IDLE_TTL``        seconds before an idle session expires (default 1800)
+``CHAT_CONTEXT_TOKENS``  token budget for profile + history (default 1024)
+``CHAT_MESSAGE_TOKENS``  longest user message sent upstream (default 512)
+"""
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+
+_SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English)."""
+    return (len(text) + 3) // 4
+
+
+def truncate_tokens(text, tokens):
+    """Cut ``text`` down to roughly ``tokens`` tokens."""
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - 3)].rstrip() + '...'
+
+
+def _gist(text, limit=120):
+    """First sentence of ``text``, clipped to ``limit`` characters."""
+    text = ' '.join(text.split())
+    first = _SENTENCE_END.split(text, 1)[0]
+    return first if len(first) <= limit else first[:limit - 3].rstrip() + '...'
+
+
+class Conversation:
+    """Recent turns of one chat session plus a summary of older ones."""
+
+    def __init__(self, conversation_id, recent_exchanges=4, summary_lines=8):
+        self.id = conversation_id
+        self.turns = deque()
+        self.recent_exchanges = recent_exchanges
+        self.summary = deque(maxlen=summary_lines)
+        self.last_seen = time.monotonic()
+
+    def add_exchange(self, message, answer):
+        self.turns.append(('User', message))
+        self.turns.append(('FitAI', answer))
+        while len(self.turns) > 2 * self.recent_exchanges:
+            _, old_message = self.turns.popleft()
+            _, old_answer = self.turns.popleft()
+            self.summary.append(f"- User asked: {_gist(old_message)} FitAI: {_gist(old_answer)}")
+
+    def build_context(self, profile, budget):
+        """Profile, summary and recent turns that together fit in ``budget`` tokens."""
+        sections = []
+        remaining = budget
+
+        if profile:
+            profile = truncate_tokens(profile, budget // 4)
+            sections.append(profile)
+            remaining -= estimate_tokens(profile)
+
+        summary_budget = min(remaining, budget // 4)
+        summary = []
+        for line in reversed(self.summary):
+            cost = estimate_tokens(line) + 1
+            if cost > summary_budget:
+                break
+            summary.insert(0, line)
+            summary_budget -= cost
+        if summary:
+            text = "Earlier in this conversation:\n" + '\n'.join(summary)
+            sections.append(text)
+            remaining -= estimate_tokens(text)
+
+        recent = []
+        remaining -= 8  # heading
+        for role, text in reversed(self.turns):
+            line = f"{role}: {text}"
+            cost = estimate_tokens(line) + 1
+            if cost > remaining:
+                # A long answer is clipped rather than dropping every older turn
+                if remaining > 32:
+                    recent.insert(0, truncate_tokens(line, remaining - 1))
+                break
+            recent.insert(0, line)
+            remaining -= cost
+        if recent:
+            sections.append("Recent messages:\n" + '\n'.join(recent))
+
+        return '\n\n'.join(sections)
+
+
+class ConversationStore:
+    """Thread-safe LRU of conversations with an idle timeout."""
+
+    def __init__(self, max_sessions=1000, idle_ttl=1800, context_tokens=1024, message_tokens=512,
+                 clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.context_tokens = context_tokens
+        self.message_tokens = message_tokens
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_sessions=int(os.getenv('CHAT_MAX_SESSIONS', '1000')),
+            idle_ttl=float(os.getenv('CHAT_IDLE_TTL', '1800')),
+            context_tokens=int(os.getenv('CHAT_CONTEXT_TOKENS', '1024')),
+            message_tokens=int(os.getenv('CHAT_MESSAGE_TOKENS', '512')),
+        )
+
+    def get(self, conversation_id=None):
+        """Return the session for ``conversation_id``, starting a new one if needed."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            if not conversation_id or not _SESSION_ID.match(conversation_id):
+                conversation_id = secrets.token_urlsafe(16)
+            conversation = self._sessions.pop(conversation_id, None)
+            if conversation is None:
+                conversation = Conversation(conversation_id)
+            conversation.last_seen = now
+            self._sessions[conversation_id] = conversation
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+            return conversation
+
+    def _expire(self, now):
+        # Sessions are in least-recently-used order, so stop at the first live one
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_seen < self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    def prepare(self, conversation, message, profile=""):
+        """Clip ``message`` and assemble the bounded context for the next turn."""
+        message = truncate_tokens(message, self.message_tokens)
+        with self._lock:
+            context = conversation.build_context(profile, self.context_tokens)
+        return message, context
+
+    def record(self, conversation, message, answer):
+        with self._lock:
+            conversation.add_exchange(message, answer)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'evicted': self.evicted,
+                'expired': self.expired,
+                'context_tokens': self.context_tokens,
+            }
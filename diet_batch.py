@@ -0,0 +1,145 @@
+"""
+Diet plans for whole batches of member profiles.
+
+Partner gyms onboard members by the thousand. Building a WeeklyDietPlan
+and rendering diet.html per member spends most of its time in Python
+overhead, so the batch path works on columns instead. BMR and daily
+calories are NumPy expressions over the whole batch. Meals are drawn with
+one ``sample_days`` call per plan type from the shared diet catalog. Plans
+come back as structured JSON, built a chunk at a time so a large batch can
+be streamed as NDJSON.
+
+Unlike /diet, whose meal solver fits each day to the member's calorie
+target, macro split and health limits, batch meals are drawn at random:
+``daily_calories`` is reported but does not shape the meals, so a batch
+plan differs from the /diet plan for the same profile.
+
+The health-condition rules live here too, so the health notes and limits
+agree everywhere.
+
+Configuration comes from the environment:
+
+``DIET_BATCH_MAX``          most profiles accepted per request (default 10000)
+``DIET_BATCH_STREAM_OVER``  larger batches are streamed as NDJSON (default 1000)
+"""
+import math
+import os
+
+from catalogs import MEAL_TYPES
+from lazy_imports import LazyModule
+
+np = LazyModule('numpy')
+
+MAX_BATCH_PROFILES = int(os.getenv('DIET_BATCH_MAX', '10000'))
+STREAM_OVER = int(os.getenv('DIET_BATCH_STREAM_OVER', '1000'))
+CHUNK_SIZE = 1024
+DAYS = 7
+
+NUMERIC_FIELDS = ('age', 'height', 'weight')
+TEXT_FIELDS = ('gender', 'goal', 'diet_type')
+
+# First matching condition wins
+HEALTH_ADJUSTMENTS = (
+    ('Diabetes', 'diabetic_friendly'),
+    ('High Blood Pressure', 'low_sodium'),
+    ('Heart Disease', 'heart_healthy'),
+    ('High Cholesterol', 'low_cholesterol'),
+)
+HEALTH_NOTES = {
+    'diabetic_friendly': 'Focus on low glycemic index foods, monitor carbohydrate intake',
+    'low_sodium': 'Limit salt intake, avoid processed foods, use herbs for flavoring',
+    'heart_healthy': 'Emphasize omega-3 fatty acids, limit saturated fats',
+    'low_cholesterol': 'Reduce animal fats, increase fiber intake, focus on plant-based proteins',
+}
+# Most grams per serving for each health adjustment. The catalog has no
+# sodium column, so low_sodium adds no limit.
+HEALTH_LIMITS = {
+    'diabetic_friendly': {'carbs': 30},
+    'heart_healthy': {'fats': 10},
+    'low_cholesterol': {'fats': 8},
+}
+CALORIE_OFFSETS = {'weight gain': 500, 'weight loss': -500}
+
+
+class ProfileError(ValueError):
+    """A profile in the batch is missing a field or has an invalid value."""
+
+
+def health_adjusted_diet_type(diet_type, health_conditions):
+    """The diet type to follow given the member's health conditions."""
+    for condition, adjusted in HEALTH_ADJUSTMENTS:
+        if condition in (health_conditions or ()):
+            return adjusted
+    return diet_type
+
+
+def plan_type(diet_type):
+    """Catalog plan type for a diet type, as WeeklyDietPlan maps it."""
+    return {'weight gain': 'weight_gain', 'weight loss': 'weight_loss'}.get(diet_type, 'maintenance')
+
+
+def validate_profiles(profiles):
+    """Check every profile up front, so a stream never fails halfway."""
+    if not isinstance(profiles, list) or not profiles:
+        raise ProfileError("profiles must be a non-empty list")
+    if len(profiles) > MAX_BATCH_PROFILES:
+        raise ProfileError(f"at most {MAX_BATCH_PROFILES} profiles per request")
+    for i, profile in enumerate(profiles):
+        if not isinstance(profile, dict):
+            raise ProfileError(f"profile {i}: expected an object")
+        for field in NUMERIC_FIELDS:
+            value = profile.get(field)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) \
+                    or not math.isfinite(value) or value <= 0:
+                raise ProfileError(f"profile {i}: {field} must be a positive number")
+        for field in TEXT_FIELDS:
+            if not isinstance(profile.get(field), str):
+                raise ProfileError(f"profile {i}: {field} is required")
+        conditions = profile.get('health_conditions', [])
+        if not isinstance(conditions, list):
+            raise ProfileError(f"profile {i}: health_conditions must be a list")
+
+
+def bmr(weight, height, age, male):
+    """Mifflin-St Jeor BMR over arrays, matching WeeklyDietPlan.calculate_bmr."""
+    return 10 * weight + 6.25 * height - 5 * age + np.where(male, 5, -161)
+
+
+def daily_calories(bmr_values, goals):
+    """BMR adjusted for each goal, matching WeeklyDietPlan.adjust_calories."""
+    return bmr_values + np.array([CALORIE_OFFSETS.get(goal, 0) for goal in goals])
+
+
+def _chunk_plans(profiles, start, index, rng):
+    columns = {field: np.array([profile[field] for profile in profiles], dtype=float) for field in NUMERIC_FIELDS}
+    bmr_values = bmr(columns['weight'], columns['height'], columns['age'],
+                     np.array([profile['gender'] == 'male' for profile in profiles]))
+    calories = daily_calories(bmr_values, [profile['goal'] for profile in profiles])
+
+    # One draw per plan type covers every day of every member of that type
+    plan_types = np.array([plan_type(profile['diet_type']) for profile in profiles])
+    weeks = [None] * len(profiles)
+    for kind in np.unique(plan_types):
+        members = np.flatnonzero(plan_types == kind)
+        drawn = index.sample_days(kind, DAYS * len(members), rng=rng).reshape(len(members), DAYS, len(MEAL_TYPES))
+        for member, week in zip(members.tolist(), drawn.tolist()):
+            weeks[member] = week
+
+    for i, profile in enumerate(profiles):
+        adjusted = health_adjusted_diet_type(profile['diet_type'], profile.get('health_conditions'))
+        plan = {
+            'index': start + i,
+            'bmr': round(float(bmr_values[i]), 1),
+            'daily_calories': round(float(calories[i]), 1),
+            'diet_type': adjusted,
+            'plan': {f'Day {day + 1}': dict(zip(MEAL_TYPES, meals)) for day, meals in enumerate(weeks[i])},
+        }
+        if adjusted in HEALTH_NOTES:
+            plan['health_notes'] = HEALTH_NOTES[adjusted]
+        yield plan
+
+
+def iter_plans(profiles, index, rng, chunk_size=CHUNK_SIZE):
+    """Yield one plan dict per validated profile, computed ``chunk_size`` at a time."""
+    for start in range(0, len(profiles), chunk_size):
+        yield from _chunk_plans(profiles[start:start + chunk_size], start, index, rng)
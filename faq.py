@@ -0,0 +1,220 @@
+"""
+Local FAQ answerer that short-circuits the LLM for common questions.
+
+A TF-IDF index (sparse vectors in an inverted index) is built once over the
+curated Q&A pairs in ``faq_corpus.json`` plus questions derived from the
+diet and exercise catalogs ("How many calories are in Chapati?"). A
+question whose best match clears ``FAQ_MIN_SCORE`` (cosine similarity,
+default 0.6) is answered locally in a few milliseconds without calling
+Gemini. When no Gemini key is configured the answerer acts as an offline
+fallback with the looser ``FAQ_OFFLINE_MIN_SCORE`` (default 0.4). An offline
+match must also share a word with the question beyond the generated
+templates' wording (a food or exercise name), so "How many calories are in
+pizza?" is not answered with another food's facts.
+"""
+import json
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+
+from catalogs import BASE_DIR
+
+FAQ_CORPUS = os.path.join(BASE_DIR, 'faq_corpus.json')
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Weight of a query word the index has never seen, as a multiple of the highest idf
+UNKNOWN_WORD_WEIGHT = 3.0
+
+STOPWORDS = frozenset("""
+a about am an and any are as at be can could do does for from get go good have
+hey hi how i if in into is it its just me much my of on or per please really
+should so some than thank thanks that the their them there this to too want was
+what when where which who why will with would you your
+""".split())
+
+
+def _stem(word):
+    for suffix in ('ing', 'es', 's'):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Unigram and bigram terms of ``text`` with stop words removed."""
+    words = [_stem(word) for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+class FaqIndex:
+    """TF-IDF cosine search over question texts, each mapped to an answer."""
+
+    def __init__(self, entries):
+        self.questions = [question for question, _ in entries]
+        self.answers = [answer for _, answer in entries]
+
+        term_counts = []
+        document_frequency = defaultdict(int)
+        for question in self.questions:
+            counts = defaultdict(int)
+            for term in tokenize(question):
+                counts[term] += 1
+            term_counts.append(counts)
+            for term in counts:
+                document_frequency[term] += 1
+
+        total = len(self.questions)
+        self.idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        self.max_idf = max(self.idf.values(), default=1.0)
+        self.postings = defaultdict(list)
+        for doc_id, counts in enumerate(term_counts):
+            weights = {term: (1 + math.log(count)) * self.idf[term] for term, count in counts.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            for term, weight in weights.items():
+                self.postings[term].append((doc_id, weight / norm))
+
+    def _query_idf(self, term):
+        # Query terms no question uses still count in the query norm, so
+        # content no answer covers ("...if I have a hernia") lowers every
+        # score. An unseen word weighs three times the rarest term; an unseen
+        # pairing of known words ("knee injury") weighs the same as it
+        idf = self.idf.get(term)
+        if idf is None:
+            idf = self.max_idf if ' ' in term else UNKNOWN_WORD_WEIGHT * self.max_idf
+        return idf
+
+    def search(self, query, limit=1):
+        """Return up to ``limit`` ``(score, doc_id)`` pairs, best first."""
+        counts = defaultdict(int)
+        for term in tokenize(query):
+            counts[term] += 1
+        if not any(term in self.idf for term in counts):
+            return []
+        weights = {term: (1 + math.log(count)) * self._query_idf(term) for term, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+
+        scores = defaultdict(float)
+        for term, weight in weights.items():
+            query_weight = weight / norm
+            for doc_id, doc_weight in self.postings.get(term, ()):
+                scores[doc_id] += query_weight * doc_weight
+        return sorted(((score, doc_id) for doc_id, score in scores.items()), reverse=True)[:limit]
+
+
+def curated_entries(path=FAQ_CORPUS):
+    with open(path, encoding='utf-8') as f:
+        corpus = json.load(f)
+    return [(question, item['answer']) for item in corpus for question in item['questions']]
+
+
+CALORIES_QUESTION = "How many calories are in {}?"
+NUTRITION_QUESTION = "{} nutrition protein fat carbs"
+REPS_QUESTION = "How many reps of {} should I do?"
+
+_TEMPLATES = (CALORIES_QUESTION, NUTRITION_QUESTION, REPS_QUESTION)
+_GENERATED = re.compile('|'.join(re.escape(template).replace(r'\{\}', '.+') for template in _TEMPLATES))
+# Wording every generated question shares, which says nothing about which food or exercise is meant
+TEMPLATE_TERMS = frozenset(term for template in _TEMPLATES for term in tokenize(template.format('')))
+
+
+def _number(value):
+    return f"{value:g}"
+
+
+def diet_entries(diet):
+    """Nutrition questions for every food in the diet catalog."""
+    entries = []
+    for food, meal_type, diet_type, (calories, protein, fats, carbs) in zip(
+            diet.food_items, diet.meal_types, diet.diet_types, diet.nutrients):
+        food = food.strip()
+        answer = (
+            f"**{food}** has about {_number(calories)} calories, {_number(protein)} g protein, "
+            f"{_number(fats)} g fat and {_number(carbs)} g carbs per serving. In our diet plans it is a "
+            f"{meal_type.lower()} option for {diet_type.replace('_', ' ')}."
+        )
+        entries.append((CALORIES_QUESTION.format(food), answer))
+        entries.append((NUTRITION_QUESTION.format(food), answer))
+    return entries
+
+
+def exercise_entries(exercises):
+    """Rep-range questions for every exercise in the catalog."""
+    category_names = {'warmup': 'warm-up', 'cooldown': 'cool-down', 'exercise': 'main workout'}
+    entries = []
+    for category, rows in exercises.by_category.items():
+        label = category_names.get(category, category)
+        for name, reps_min, reps_max in rows:
+            if reps_min is not None:
+                answer = f"In FitAI routines **{name}** is a {label} exercise done for {reps_min}-{reps_max} reps."
+            else:
+                answer = f"In FitAI routines **{name}** is a duration-based {label} exercise."
+            entries.append((REPS_QUESTION.format(name), answer))
+    return entries
+
+
+class FaqAnswerer:
+    """Answers a question locally when the best FAQ match is confident enough."""
+
+    def __init__(self, index, min_score=0.6, offline_min_score=0.4):
+        # A FaqIndex, or a function that builds one on first use
+        self._index = index
+        self._lock = threading.Lock()
+        # Separate, so counting never waits on a first index build
+        self._stats_lock = threading.Lock()
+        self.min_score = min_score
+        self.offline_min_score = offline_min_score
+        self.answered = 0
+        self.passed_through = 0
+
+    @classmethod
+    def from_catalogs(cls, diet_catalog, exercise_catalog, corpus_path=FAQ_CORPUS):
+        """Answerer over the curated corpus and both catalogs, read and indexed on the first question."""
+        def build_index():
+            diet, exercises = diet_catalog.get(), exercise_catalog.get()
+            return FaqIndex(curated_entries(corpus_path) + diet_entries(diet) + exercise_entries(exercises))
+        return cls(
+            build_index,
+            min_score=float(os.getenv('FAQ_MIN_SCORE', '0.6')),
+            offline_min_score=float(os.getenv('FAQ_OFFLINE_MIN_SCORE', '0.4')),
+        )
+
+    @property
+    def index(self):
+        if not isinstance(self._index, FaqIndex):
+            with self._lock:
+                if not isinstance(self._index, FaqIndex):
+                    self._index = self._index()
+        return self._index
+
+    def answer(self, question, offline=False):
+        """Return a local answer, or ``None`` if the question should go to the LLM."""
+        threshold = self.offline_min_score if offline else self.min_score
+        matches = self.index.search(question)
+        if matches and matches[0][0] >= threshold and (not offline or self._names_subject(question, matches[0][1])):
+            with self._stats_lock:
+                self.answered += 1
+            return self.index.answers[matches[0][1]]
+        with self._stats_lock:
+            self.passed_through += 1
+        return None
+
+    def _names_subject(self, question, doc_id):
+        """Whether ``question`` shares more than template wording with a generated match."""
+        matched = self.index.questions[doc_id]
+        if not _GENERATED.fullmatch(matched):
+            return True
+        return bool(set(tokenize(question)) & set(tokenize(matched)) - TEMPLATE_TERMS)
+
+    def stats(self):
+        with self._stats_lock:
+            answered, passed_through = self.answered, self.passed_through
+        return {
+            # Not forced here, so /health stays cheap on a cold worker
+            'documents': len(self._index.questions) if isinstance(self._index, FaqIndex) else None,
+            'answered': answered,
+            'passed_through': passed_through,
+            'min_score': self.min_score,
+        }
@@ -0,0 +1,11 @@
+"""
+Gunicorn settings, read automatically from the working directory.
+
+Heavy modules are imported lazily to keep cold starts fast; each worker
+then preloads them on a background thread while it is already serving.
+"""
+
+
+def post_worker_init(worker):
+    from app import start_warm_up
+    start_warm_up()
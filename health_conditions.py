@@ -0,0 +1,166 @@
+"""
+Health-condition detection for uploaded medical documents.
+
+The keyword table is compiled once into a single alternation regex,
+factored as a prefix trie, with word-boundary semantics. One linear pass
+over the text finds every mention along with its offsets. Plain substring
+matching used to report "bp" inside unrelated words and "renal" inside
+"adrenal".
+"""
+import re
+from collections import namedtuple
+
+# Medical condition keywords mapping (matched as whole words, plurals allowed)
+CONDITION_KEYWORDS = {
+    "diabetes": "Diabetes",
+    "diabetic": "Diabetes",
+    "blood sugar": "Diabetes",
+    "glucose": "Diabetes",
+    "high blood pressure": "High Blood Pressure",
+    "hypertension": "High Blood Pressure",
+    "hypertensive": "High Blood Pressure",
+    "bp": "High Blood Pressure",
+    "heart disease": "Heart Disease",
+    "cardiac": "Heart Disease",
+    "coronary": "Heart Disease",
+    "asthma": "Asthma",
+    "asthmatic": "Asthma",
+    "respiratory": "Respiratory Issues",
+    "cancer": "Cancer",
+    "tumor": "Cancer",
+    "tumour": "Cancer",
+    "malignant": "Cancer",
+    "malignancy": "Cancer",
+    "kidney disease": "Kidney Disease",
+    "renal": "Kidney Disease",
+    "lung disease": "Lung Disease",
+    "pulmonary": "Lung Disease",
+    "cardiopulmonary": "Lung Disease",
+    "arthritis": "Arthritis",
+    "thyroid": "Thyroid Disorder",
+    "hypothyroidism": "Thyroid Disorder",
+    "hyperthyroidism": "Thyroid Disorder",
+    "cholesterol": "High Cholesterol",
+    "hypercholesterolemia": "High Cholesterol",
+    "migraine": "Migraine",
+    "depression": "Depression",
+    "anxiety": "Anxiety",
+}
+
+# Conditions are reported in table order, as they always have been
+_CONDITION_ORDER = {condition: rank for rank, condition in enumerate(dict.fromkeys(CONDITION_KEYWORDS.values()))}
+
+ConditionMatch = namedtuple('ConditionMatch', 'condition keyword start end')
+
+# Longest keyword in characters
+MAX_KEYWORD_LENGTH = max(len(keyword) for keyword in CONDITION_KEYWORDS)
+# Text held back between pieces when scanning a stream: room for the longest
+# keyword, a plural suffix and the boundary characters on either side.
+# (Phrases split by an absurd run of whitespace can still be missed.)
+STREAM_OVERLAP = 2 * MAX_KEYWORD_LENGTH
+
+
+def _trie_pattern(keywords):
+    """Regex alternation for ``keywords`` factored into a prefix trie.
+
+    Sharing prefixes keeps the regex engine from retrying every keyword at
+    each position; spaces inside a phrase match any run of whitespace.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [(r'\s+' if char == ' ' else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + pattern + ')?' if '' in node else pattern
+
+    return build(trie)
+
+
+_KEYWORDS = _trie_pattern(CONDITION_KEYWORDS)
+# Runs on lower-cased text and starts with a literal, so the regex engine can
+# skip ahead to candidate letters; the left word boundary is checked per match
+_LOWER_PATTERN = re.compile('(' + _KEYWORDS + r')(?:e?s)?\b')
+# Fallback for the rare text whose length changes when lower-cased
+_IGNORECASE_PATTERN = re.compile(r'\b(' + _KEYWORDS + r')(?:e?s)?\b', re.IGNORECASE)
+
+
+def _normalize(keyword):
+    return ' '.join(keyword.lower().split())
+
+
+def scan_health_conditions(text, offset=0):
+    """Yield a ``ConditionMatch`` for every keyword mention in ``text``.
+
+    ``offset`` is added to the reported positions, for scanning a window of a
+    larger document.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        matches = (match for match in _LOWER_PATTERN.finditer(lowered)
+                   if not match.start() or not _is_word_char(lowered[match.start() - 1]))
+    else:
+        matches = _IGNORECASE_PATTERN.finditer(text)
+    for match in matches:
+        keyword = _normalize(match.group(1))
+        yield ConditionMatch(CONDITION_KEYWORDS[keyword], keyword, offset + match.start(), offset + match.end())
+
+
+def scan_health_conditions_stream(pieces):
+    """Like ``scan_health_conditions`` over text arriving as a sequence of pieces.
+
+    Only the last ``STREAM_OVERLAP`` characters are carried between pieces,
+    so memory stays bounded, and a keyword split across two pieces is found
+    exactly once, with offsets into the whole stream.
+    """
+    buffer = ''
+    base = 0        # stream offset of buffer[0]
+    scanned_to = 0  # stream offset where the next reported match may start
+    for piece, final in _with_final(pieces):
+        buffer += piece
+        if not final and len(buffer) < 2 * STREAM_OVERLAP:
+            continue
+        # Matches starting past ``safe`` could still grow (or be disqualified)
+        # by text that hasn't arrived yet; they are found on the next round
+        safe = len(buffer) if final else len(buffer) - STREAM_OVERLAP
+        for match in scan_health_conditions(buffer, offset=base):
+            if match.start >= base + safe:
+                break
+            if match.start >= scanned_to:
+                scanned_to = match.end
+                yield match
+        scanned_to = max(scanned_to, base + safe)
+        # Keep one character before the unscanned text for the boundary check
+        keep = max(0, safe - 1)
+        buffer = buffer[keep:]
+        base += keep
+
+
+def _with_final(pieces):
+    """Pair each piece with whether it is the last; always ends with a final one."""
+    for piece in pieces:
+        yield piece, False
+    yield '', True
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+def order_conditions(conditions):
+    """Unique conditions in the canonical table order."""
+    return sorted(set(conditions), key=_CONDITION_ORDER.__getitem__)
+
+
+def detect_health_conditions_from_text(text):
+    """Detect health conditions from text content"""
+    if not text:
+        return []
+    return order_conditions(match.condition for match in scan_health_conditions(text))
@@ -0,0 +1,35 @@
+"""
+Deferred imports for heavy dependencies.
+
+``google.generativeai`` (~0.6s), ``pandas`` (~0.3s) and ``numpy`` used to be
+imported when the app loaded, so a cold start paid for them even when the
+first request was a static page or /health. A ``LazyModule`` stands in for
+the module and imports it the first time one of its attributes is used.
+"""
+import importlib
+
+
+class LazyModule:
+    """Proxy that imports module ``name`` on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        # import_module is thread-safe; at worst two threads both look the
+        # module up in sys.modules
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule {self._name!r} ({state})>"
@@ -0,0 +1,152 @@
+"""
+Structured, non-blocking logging for the web app.
+
+Request threads only put records on a bounded in-memory queue. A listener
+thread does the formatting (one JSON object per line) and the write to
+stderr, so slow log I/O never adds latency to a request. If the queue
+fills up, records are dropped and counted rather than blocking.
+
+High-frequency events are logged with ``extra={'sampled': True}``; only
+one in ``1 / LOG_SAMPLE_RATE`` of each such message is kept. Secrets
+(API keys, ``token=...`` pairs) are masked everywhere. Fields that carry
+user text (``user_message``, ``prompt``, ``answer``, ``context``) are
+reduced to their length unless ``LOG_PROMPTS`` is enabled.
+
+Configuration comes from the environment:
+
+``LOG_LEVEL``        minimum level (default INFO)
+``LOG_SAMPLE_RATE``  share of sampled events kept (default 0.1)
+``LOG_PROMPTS``      set to 1 to log user text in full (default off)
+``LOG_QUEUE_SIZE``   records buffered before dropping (default 10000)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+import time
+
+PROMPT_FIELDS = frozenset({'user_message', 'prompt', 'answer', 'context', 'user_prompt'})
+
+_SECRET_PATTERNS = [
+    re.compile(r'AIza[0-9A-Za-z_\-]{35}'),  # Google API keys
+    re.compile(r'(?i)\b(api[_-]?key|token|secret|password)(["\']?\s*[=:]\s*["\']?)[^\s"\'&,]+'),
+]
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def redact_secrets(text):
+    """Mask API keys and ``key=value`` credentials in ``text``."""
+    api_key = os.getenv('GEMINI_API_KEY')
+    if api_key and len(api_key) >= 8:
+        text = text.replace(api_key, '[REDACTED]')
+    text = _SECRET_PATTERNS[0].sub('[REDACTED]', text)
+    return _SECRET_PATTERNS[1].sub(r'\1\2[REDACTED]', text)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with ``extra`` fields and redaction."""
+
+    def __init__(self, log_prompts=False):
+        super().__init__()
+        self.log_prompts = log_prompts
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': redact_secrets(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key in _RECORD_ATTRIBUTES or key == 'sampled':
+                continue
+            if key in PROMPT_FIELDS and not self.log_prompts:
+                value = f'<{len(str(value))} chars>'
+            elif isinstance(value, str):
+                value = redact_secrets(value)
+            entry[key] = value
+        if record.exc_info:
+            entry['exc'] = redact_secrets(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every ``1 / rate`` records of each sampled message."""
+
+    def __init__(self, rate=0.1):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else None
+        self._seen = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False):
+            return True
+        with self._lock:
+            seen = self._seen.get(record.msg, 0)
+            self._seen[record.msg] = seen + 1
+            if self.every is not None and seen % self.every == 0:
+                return True
+            self.dropped += 1
+            return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records untouched; the listener thread does all formatting."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The stock handler formats here, on the request thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler = None
+_listener = None
+_sampler = None
+
+
+def configure_logging(stream=None):
+    """Route the root logger through the queue. Safe to call more than once."""
+    global _handler, _listener, _sampler
+    if _handler is not None:
+        return
+    level = os.getenv('LOG_LEVEL', 'INFO').upper()
+    log_prompts = os.getenv('LOG_PROMPTS', '').lower() in ('1', 'true', 'yes')
+
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter(log_prompts=log_prompts))
+    log_queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+    _sampler = SamplingFilter(float(os.getenv('LOG_SAMPLE_RATE', '0.1')))
+    _handler = NonBlockingQueueHandler(log_queue)
+    _handler.addFilter(_sampler)
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_handler)
+
+
+def stats():
+    return {
+        'sampled_out': _sampler.dropped if _sampler else 0,
+        'queue_dropped': _handler.dropped if _handler else 0,
+        'queued': _handler.queue.qsize() if _handler else 0,
+    }
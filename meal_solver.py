@@ -0,0 +1,210 @@
+"""
+Meal selection that lands a day on its calorie target and macro split.
+
+WeeklyDietPlan used to pick one random item per meal type and ignore the
+calorie target it had just computed. The solver picks one item per meal
+type whose day total is as close as possible to the target calories and
+to the goal's protein/fat/carb split (as shares of macro calories).
+
+The search is a dynamic program over day calories in ``BUCKET_KCAL``
+steps. Meal slots are added one at a time. Each calorie bucket keeps only
+the partial day whose macro split is closest to the target, and buckets
+that can no longer end inside the calorie tolerance are dropped. Candidate
+tables are built once per (catalog, diet type, goal). In every slot they
+keep only the ``PER_BUCKET`` items per calorie bucket that best fit the
+split, so the work per day stays flat as the catalog grows.
+
+Slots only offer foods within the per-serving limits of the member's
+health conditions, and a partial day never takes an item it already has.
+The items of the days passed as ``exclude`` (the last few of the plan)
+are left out wherever the day can do without them: each calorie bucket
+keeps the partial day with the fewest repeats, then the best macro split.
+An item eaten on a recent day counts once, and again if it was at the
+same meal, so a small catalog at least moves its items between meals. A
+seeded random jitter, scaled to how far apart the scores being compared
+are, varies which of the good days is picked.
+"""
+import threading
+import weakref
+from collections import namedtuple
+
+from catalogs import MEAL_TYPES
+from lazy_imports import LazyModule
+
+np = LazyModule('numpy')
+
+# Shares of macro calories (protein, fats, carbs) per goal
+MACRO_SPLITS = {
+    'weight loss': (0.30, 0.25, 0.45),
+    'weight gain': (0.25, 0.25, 0.50),
+}
+MAINTENANCE_SPLIT = (0.20, 0.30, 0.50)
+KCAL_PER_GRAM = (4, 9, 4)
+
+CALORIE_TOLERANCE = 0.10  # |day - target| / target
+MACRO_TOLERANCE = 0.10    # half the L1 distance between macro shares
+MACRO_WEIGHT = 0.5        # macro error against calorie error in the final pick
+BUCKET_KCAL = 25
+PER_BUCKET = 4
+JITTER = 2.0              # random tie-breaking for variety, as a multiple of the spread of the scores compared
+NEAR_MISS = 0.05          # when no day is within tolerance, extra error allowed over the closest one
+RECENT_DAYS = 2           # days before this one whose items a plan leaves out
+
+Candidates = namedtuple('Candidates', 'rows calories macros')
+Solution = namedtuple('Solution', 'rows labels calories macros within_tolerance')
+
+
+def macro_split(goal):
+    return MACRO_SPLITS.get(goal, MAINTENANCE_SPLIT)
+
+
+def _run_starts(sorted_keys):
+    """Mask of the positions where a new value starts in ``sorted_keys``."""
+    starts = np.empty(len(sorted_keys), dtype=bool)
+    starts[:1] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=starts[1:])
+    return starts
+
+
+def _repeats(rows, recent, meal):
+    """How often each of ``rows`` was eaten on the ``recent`` days, plus how often at that ``meal``."""
+    eaten = (recent[:, :, None] == rows).any(axis=1).sum(axis=0)
+    return eaten + (recent[:, meal, None] == rows).sum(axis=0)
+
+
+def _jittered(score, rng):
+    """``score`` plus noise up to ``JITTER`` times its spread, or as is without ``rng``."""
+    if rng is None or len(score) < 2:
+        return score
+    # Equal scores are still shuffled
+    return score + rng.uniform(0, JITTER * (np.ptp(score) or 1.0), len(score))
+
+
+def share_error(macros, split):
+    """Half the L1 distance between the macro-calorie shares of ``macros`` and ``split``."""
+    kcal = macros * np.array(KCAL_PER_GRAM)
+    total = np.maximum(kcal.sum(axis=-1, keepdims=True), 1e-9)
+    return np.abs(kcal / total - np.array(split)).sum(axis=-1) / 2
+
+
+class MealSolver:
+    """One item per meal type, chosen to hit a calorie target and macro split.
+
+    ``limits`` maps nutrients to the most grams a serving may have.
+    """
+
+    def __init__(self, index, diet_type, split, meal_types=MEAL_TYPES, limits=None):
+        self.labels = index.labels
+        self.split = tuple(split)
+        allowed = index.within_limits(limits) if limits else None
+        slots = [self._candidates(index, index.pool(diet_type, meal_type, allowed)) for meal_type in meal_types]
+        # Slots with the fewest options are filled first, so the flexible
+        # ones work around them instead of taking their only item
+        self._fill_order = sorted(range(len(slots)), key=lambda i: len(slots[i].rows))
+        self._meal_order = np.argsort(self._fill_order)
+        self.slots = [slots[i] for i in self._fill_order]
+        # Most calories the slots after each one can still add, for pruning
+        most = [slot.calories.max() for slot in self.slots]
+        self._remaining_max = [sum(most[i + 1:]) for i in range(len(most))]
+        self._day_range = (sum(slot.calories.min() for slot in self.slots), sum(most))
+
+    def _candidates(self, index, rows):
+        calories = index.nutrients[rows, 0]
+        macros = index.nutrients[rows, 1:]
+        fit = share_error(macros, self.split)
+        # Within a calorie bucket, items are interchangeable for the calorie
+        # target, so only the best few for the macro split are worth trying
+        bucket = (calories // BUCKET_KCAL).astype(np.int64)
+        order = np.lexsort((fit, bucket))
+        sorted_bucket = bucket[order]
+        starts = np.flatnonzero(_run_starts(sorted_bucket))
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.append(starts, len(order))))
+        kept = rank < PER_BUCKET
+        keep = order[kept]
+        return Candidates(rows[keep], calories[keep], macros[keep])
+
+    def solve(self, target_calories, rng=None, exclude=()):
+        """Best day for ``target_calories`` unlike the ``exclude`` days' rows; ``rng`` varies the pick among good days."""
+        recent = np.asarray(exclude, dtype=np.intp).reshape(-1, len(self.slots))
+        solution = self._search(target_calories, rng, recent)
+        if solution.within_tolerance or not self._reachable(target_calories):
+            return solution
+        # The jitter, or avoiding recent items, can crowd out the partial days
+        # that would have made it; variety never costs a day its tolerance
+        plain = self._search(target_calories, None, recent[:0])
+        return plain if plain.within_tolerance else solution
+
+    def _reachable(self, target_calories):
+        lightest, heaviest = self._day_range
+        return lightest <= target_calories * (1 + CALORIE_TOLERANCE) and \
+            heaviest >= target_calories * (1 - CALORIE_TOLERANCE)
+
+    def _search(self, target_calories, rng, recent):
+        low = target_calories * (1 - CALORIE_TOLERANCE)
+        high = target_calories * (1 + CALORIE_TOLERANCE)
+        state_calories = np.zeros(1)
+        state_macros = np.zeros((1, 3))
+        state_repeats = np.zeros(1, dtype=np.intp)
+        state_rows = np.zeros((1, 0), dtype=np.intp)
+        most_repeats = 2 * len(recent) * len(self.slots)
+
+        for i, slot in enumerate(self.slots):
+            rows = slot.rows
+            calories = (state_calories[:, None] + slot.calories).ravel()
+            macros = (state_macros[:, None, :] + slot.macros).reshape(-1, 3)
+            repeats = (state_repeats[:, None] + _repeats(rows, recent, self._fill_order[i])).ravel()
+
+            # An item can fill only one slot of the day, unless every option
+            # is already taken
+            fresh = ~(state_rows[:, :, None] == rows).any(axis=1).ravel()
+            if not fresh.any():
+                fresh[:] = True
+            # Drop partial days that can only end outside the tolerance,
+            # unless nothing would be left (then the closest miss wins)
+            viable = fresh & (calories <= high) & (calories + self._remaining_max[i] >= low)
+            kept = np.flatnonzero(viable if viable.any() else fresh)
+
+            score = _jittered(share_error(macros[kept], self.split), rng)
+            # Fewest repeats, then best score, per calorie bucket (score plus
+            # jitter stays below 3, so one float sort orders by all three)
+            bucket = calories[kept] // BUCKET_KCAL
+            order = np.argsort((bucket * (most_repeats + 1) + repeats[kept]) * 4 + score)
+            sorted_bucket = bucket[order]
+            best = kept[order[_run_starts(sorted_bucket)]]
+
+            state_rows = np.column_stack((state_rows[best // len(rows)], rows[best % len(rows)]))
+            state_calories = calories[best]
+            state_macros = macros[best]
+            state_repeats = repeats[best]
+
+        calorie_error = np.abs(state_calories - target_calories) / max(target_calories, 1)
+        macro_error = share_error(state_macros, self.split)
+        error = calorie_error + MACRO_WEIGHT * macro_error
+        within = (calorie_error <= CALORIE_TOLERANCE) & (macro_error <= MACRO_TOLERANCE)
+        # Any day inside both tolerances will do, or failing that any day
+        # nearly as close as the best; of those with the fewest repeats, the
+        # jitter varies which one is picked
+        near = np.flatnonzero(within if within.any() else error <= error.min() + NEAR_MISS)
+        state = int(near[np.lexsort((_jittered(error[near], rng), state_repeats[near]))[0]])
+        within = bool(within[state])
+
+        rows = state_rows[state][self._meal_order]
+        return Solution(rows, self.labels[rows], float(state_calories[state]),
+                        dict(zip(('protein', 'fats', 'carbs'), state_macros[state].round(1).tolist())), within)
+
+
+_solvers = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def solver_for(index, diet_type, goal, meal_types=MEAL_TYPES, limits=None):
+    """Shared solver for a catalog index, built on first use and dropped with the index."""
+    key = (diet_type, macro_split(goal), tuple(meal_types), tuple(sorted((limits or {}).items())))
+    with _lock:
+        solvers = _solvers.setdefault(index, {})
+        solver = solvers.get(key)
+    if solver is None:
+        solver = MealSolver(index, diet_type, key[1], meal_types, limits)
+        with _lock:
+            solver = solvers.setdefault(key, solver)
+    return solver
@@ -0,0 +1,161 @@
+"""
+In-process counters and histograms served as Prometheus text at /metrics.
+
+Recording is a lock, a dict lookup and a bisect (about a microsecond), so
+it can sit on every request. Each metric has its own lock, which keeps
+updates from gunicorn's threads consistent without a global bottleneck.
+Numbers are per gunicorn worker: a scrape reports the worker that served it.
+
+The ``stats()`` dicts already shown on /health can be exported too,
+flattened into gauges when the page is scraped.
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds, from a cached page render up to a slow Gemini answer
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Bytes, from a short note up to the upload limit
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count, optionally split by label values."""
+
+    kind = 'counter'
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with sum and count, as Prometheus expects."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, description, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts plus one overflow slot, then the sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), values):
+                cumulative += count
+                yield (f'{self.name}_bucket', _labels(self.labelnames, labels, [('le', _number(bound))]),
+                       cumulative)
+            yield f'{self.name}_sum', _labels(self.labelnames, labels), values[-1]
+            yield f'{self.name}_count', _labels(self.labelnames, labels), cumulative
+
+
+class StatsGauges:
+    """Numeric fields of a component's ``stats()`` dict, read at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, description, stats):
+        self.name = name
+        self.description = description
+        self._stats = stats
+
+    def samples(self):
+        for key, value in sorted(self._stats().items()):
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                yield self.name, f'{{field="{_escape(key)}"}}', value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, description, labelnames=()):
+        return self.register(Counter(name, description, labelnames))
+
+    def histogram(self, name, description, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, description, labelnames, buckets))
+
+    def stats_gauges(self, name, description, stats):
+        return self.register(StatsGauges(name, description, stats))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.description}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_number(value)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,99 @@
+"""
+Reproducible workout and diet plans, cached per profile.
+
+Plans used to be drawn from the global random state, so the same inputs
+gave a different plan on every refresh and nothing could be reused. Each
+plan is now generated from a seed derived from the profile and a plan
+version. The same inputs always give the same plan, so the rendered result
+is kept in a bounded LRU and repeat requests (or a browser revalidating
+its ETag) skip generation entirely. A different plan is one version bump
+away: per request with the ``plan_version`` form field, or for everyone
+with ``PLAN_VERSION``.
+
+Configuration comes from the environment:
+
+``PLAN_CACHE_SIZE``  maximum number of rendered plans (default 512, 0 disables)
+``PLAN_VERSION``     mixed into every seed; change it to reshuffle all plans (default 1)
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+PLAN_VERSION = os.getenv('PLAN_VERSION', '1')
+
+
+def plan_seed(profile, version=''):
+    """64-bit seed for ``profile`` (a tuple of plain values) at ``version``."""
+    raw = json.dumps([PLAN_VERSION, str(version), *profile], default=str)
+    return int.from_bytes(hashlib.sha256(raw.encode('utf-8')).digest()[:8], 'big')
+
+
+def encode_plan_id(fields):
+    """Opaque, URL-safe plan id carrying the profile ``fields`` it was made from.
+
+    Nothing is stored server-side: any worker can regenerate any week of a
+    plan from its id alone.
+    """
+    raw = json.dumps(fields, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_plan_id(plan_id):
+    """The fields behind ``plan_id``; raises ValueError if it is not one of ours."""
+    try:
+        fields = json.loads(base64.urlsafe_b64decode(plan_id + '=' * (-len(plan_id) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("malformed plan id") from e
+    if not isinstance(fields, dict):
+        raise ValueError("malformed plan id")
+    return fields
+
+
+class PlanCache:
+    """Thread-safe LRU of generated plans keyed on (profile, adjustments, seed).
+
+    Generation runs outside the lock. Two requests for the same missing key
+    both build it, but being seeded they build the same thing.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_entries=int(os.getenv('PLAN_CACHE_SIZE', '512')))
+
+    def get_or_create(self, key, build):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = build()
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
@@ -0,0 +1,143 @@
+"""
+Workout and diet plan generation shared by the web app and bulk_plans.
+
+Importing this module only loads the catalogs' code, not the Flask app
+(logging, metrics, background jobs, SQLite stores), so a process that
+forks workers after importing it has nothing but plain data to share.
+"""
+import random
+
+from catalogs import MEAL_TYPES, diet_catalog, exercise_catalog, meal_rng
+from diet_batch import HEALTH_LIMITS, HEALTH_NOTES, health_adjusted_diet_type, plan_type
+from meal_solver import RECENT_DAYS, solver_for
+
+
+# Routine generator logic using the exercise catalog
+def output(intensity, rng=random):
+    # The exercises for each intensity level are fixed when the catalog loads;
+    # only the rep counts are drawn per request
+    return exercise_catalog.get().skeleton(intensity).lines(rng)
+
+
+# Function to calculate BMI and adjust intensity
+def calculate_intensity(weight, height):
+    height_in_meters = height / 100
+    bmi = weight / (height_in_meters ** 2)
+
+    if bmi < 18.5:
+        return 50  # Low intensity for underweight
+    elif 18.5 <= bmi < 24.9:
+        return 70  # Moderate intensity for normal weight
+    elif 25 <= bmi < 29.9:
+        return 60  # Moderate intensity for overweight
+    else:
+        return 40  # Lower intensity for obesity
+
+
+class WeeklyDietPlan:
+    MAX_WEEKS = 52
+
+    def __init__(self, age, height, weight, goal, duration, diet_type, gender, activity_level, health_conditions=None,
+                 seed=None):
+        self.age = age
+        self.height = height
+        self.weight = weight
+        self.goal = goal
+        self.duration = duration
+        self.weeks = max(1, min(int(duration), self.MAX_WEEKS))  # duration is in weeks
+        self.diet_type = diet_type
+        self.gender = gender
+        self.activity_level = activity_level
+        self.health_conditions = health_conditions or []
+        self.seed = seed
+        self.rng = meal_rng(seed)  # Seeded plans are reproducible; unseeded ones share a generator
+        self.bmr = self.calculate_bmr()
+        self.daily_calories = self.adjust_calories()
+        self.diet_catalog = diet_catalog.get()  # Shared, parsed once per process
+        self._plan = None
+
+    @property
+    def plan(self):
+        """The first week, built on first use (the week API never needs it)"""
+        if self._plan is None:
+            self._plan = self.create_diet_plan()
+        return self._plan
+
+    def calculate_bmr(self):
+        if self.gender == 'male':
+            return 10 * self.weight + 6.25 * self.height - 5 * self.age + 5
+        else:
+            return 10 * self.weight + 6.25 * self.height - 5 * self.age - 161
+
+    def adjust_calories(self):
+        if self.goal == 'weight gain':
+            return self.bmr + 500
+        elif self.goal == 'weight loss':
+            return self.bmr - 500
+        else:
+            return self.bmr  # Maintenance
+
+    def create_diet_plan(self):
+        # The page shows the first week; later ones come from week()
+        return self.week(1)
+
+    def plan_type(self):
+        return plan_type(self.diet_type)
+
+    def solve_day(self, day, exclude=()):
+        """Meals for day ``day`` that best hit the calorie target and the goal's macro split, without ``exclude``"""
+        limits = HEALTH_LIMITS.get(self.adjust_diet_for_health_conditions())
+        solver = solver_for(self.diet_catalog, self.plan_type(), self.goal, limits=limits)
+        # A seeded plan derives every day from (seed, day), so any week can be
+        # generated on its own without the ones before it
+        rng = meal_rng([self.seed, day]) if self.seed is not None else self.rng
+        return solver.solve(self.daily_calories, rng, exclude)
+
+    def solve_week(self, number):
+        """Solutions for the days of week ``number``, each without the items of the days just before it"""
+        first_day = (number - 1) * 7 + 1
+        # A week's first day leaves nothing out, so the last day of the week
+        # before can avoid it without solving that whole week
+        following = self.solve_day(first_day + 7).rows if number < self.weeks else None
+        days = []
+        for day in range(first_day, first_day + 7):
+            exclude = [solution.rows for solution in days[-RECENT_DAYS:]]
+            if day == first_day + 6 and following is not None:
+                exclude.insert(0, following)
+            days.append(self.solve_day(day, exclude))
+        return days
+
+    def week(self, number):
+        """Meal plans for week ``number`` (from 1), keyed 'Day n' across the whole program."""
+        if not 1 <= number <= self.weeks:
+            raise ValueError(f"week must be between 1 and {self.weeks}")
+        # Adjust diet based on health conditions
+        adjusted_diet_type = self.adjust_diet_for_health_conditions()
+        first_day = (number - 1) * 7 + 1
+        return {f'Day {day}': self.get_meal_plan(day, self.plan_type(), adjusted_diet_type, solution.labels)
+                for day, solution in enumerate(self.solve_week(number), first_day)}
+
+    def iter_weeks(self):
+        """Yield every week of the program in turn, generated as it is consumed."""
+        for number in range(1, self.weeks + 1):
+            yield self.week(number)
+    
+    def adjust_diet_for_health_conditions(self):
+        """Adjust diet recommendations based on health conditions"""
+        return health_adjusted_diet_type(self.diet_type, self.health_conditions)
+
+    def get_meal_plan(self, day, diet_type, adjusted_diet_type, meals=None):
+        # Pick one random meal for each type unless the week was drawn already
+        if meals is None:
+            meals = self.diet_catalog.sample_days(diet_type, 1, rng=self.rng)[0]
+        meal_plan = dict(zip(MEAL_TYPES, meals.tolist()))
+        
+        # Add health condition specific notes
+        if adjusted_diet_type != diet_type:
+            meal_plan['Health Notes'] = self.get_health_specific_notes(adjusted_diet_type)
+        
+        return meal_plan
+    
+    def get_health_specific_notes(self, adjusted_diet_type):
+        """Get specific dietary notes based on health conditions"""
+        return HEALTH_NOTES.get(adjusted_diet_type, '')
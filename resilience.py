@@ -0,0 +1,177 @@
+"""
+Deadlines, bounded retries and a circuit breaker for upstream AI calls.
+
+A Gemini outage used to hold every worker thread until gunicorn's 120s
+timeout. Calls now run under an overall deadline, transient errors are
+retried a bounded number of times with jittered backoff, and after
+repeated failures the breaker opens so requests fail fast with a degraded
+answer until a trial call succeeds again.
+
+Configuration comes from the environment:
+
+``AI_TIMEOUT``           overall deadline per question in seconds (default 15)
+``AI_MAX_RETRIES``       retries after the first attempt (default 2)
+``AI_BREAKER_FAILURES``  consecutive failures that open the breaker (default 5)
+``AI_BREAKER_RESET``     seconds before a trial call is let through (default 30)
+"""
+import functools
+import os
+import random
+import threading
+import time
+
+
+@functools.lru_cache(maxsize=None)
+def transient_errors():
+    """Errors worth retrying (google.api_core is imported on first use; it is slow to load)."""
+    from google.api_core import exceptions as api_exceptions
+    return (
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.InternalServerError,
+        api_exceptions.DeadlineExceeded,
+        api_exceptions.TooManyRequests,
+        api_exceptions.ResourceExhausted,
+        api_exceptions.GatewayTimeout,
+        ConnectionError,
+        TimeoutError,
+    )
+
+
+class CircuitOpen(Exception):
+    """The breaker is open; the upstream call was not attempted."""
+
+
+class RetryPolicy:
+    """Retry transient errors with full-jitter exponential backoff inside a deadline."""
+
+    def __init__(self, timeout=15.0, max_retries=2, base_delay=0.25, max_delay=2.0,
+                 transient=None, clock=time.monotonic, sleep=time.sleep):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.transient = transient
+        self._clock = clock
+        self._sleep = sleep
+        self.retries = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            timeout=float(os.getenv('AI_TIMEOUT', '15')),
+            max_retries=int(os.getenv('AI_MAX_RETRIES', '2')),
+        )
+
+    def call(self, fn):
+        """Call ``fn(remaining_seconds)`` until it succeeds or the budget runs out."""
+        transient = self.transient or transient_errors()
+        deadline = self._clock() + self.timeout
+        attempt = 0
+        while True:
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                raise TimeoutError(f"AI call exceeded its {self.timeout:g}s deadline")
+            try:
+                return fn(remaining)
+            except transient:
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                if attempt >= self.max_retries or self._clock() + delay >= deadline:
+                    raise
+                attempt += 1
+                self.retries += 1
+                self._sleep(delay)
+
+
+class CircuitBreaker:
+    """Classic closed / open / half-open breaker counting consecutive failures."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.opened = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            failure_threshold=int(os.getenv('AI_BREAKER_FAILURES', '5')),
+            reset_timeout=float(os.getenv('AI_BREAKER_RESET', '30')),
+        )
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def before_call(self):
+        """Raise ``CircuitOpen`` unless a call may go upstream now."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+        raise CircuitOpen("AI upstream is unavailable")
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_abandoned(self):
+        """The caller went away before the call finished: no verdict either way."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.opened += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def call(self, fn):
+        self.before_call()
+        try:
+            result = fn()
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'times_opened': self.opened,
+                'rejected': self.rejected,
+                'retry_in_seconds': retry_in,
+            }
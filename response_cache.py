@@ -0,0 +1,191 @@
+"""
+LRU + TTL cache for AI coach answers.
+
+Users ask many near-identical questions, and each one used to cost a full
+Gemini round trip. Answers are keyed on the normalised prompt plus the user
+context. A bounded in-process LRU serves repeat questions, and an optional
+SQLite file (e.g. on Render's ``/data`` disk) lets every gunicorn worker
+share answers.
+
+Configuration comes from the environment:
+
+``AI_CACHE_SIZE``  maximum number of entries (default 1024, 0 disables)
+``AI_CACHE_TTL``   seconds an answer stays valid (default 3600)
+``AI_CACHE_PATH``  SQLite file for the shared backend (unset = memory only)
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger('fitai.cache')
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s?!.]+$')
+
+
+def normalize_prompt(prompt):
+    """Case-fold, collapse whitespace and drop trailing punctuation."""
+    prompt = _WHITESPACE.sub(' ', prompt.casefold()).strip()
+    return _TRAILING_PUNCTUATION.sub('', prompt)
+
+
+def cache_key(prompt, context=""):
+    raw = f"{normalize_prompt(prompt)}\x00{context or ''}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class SqliteCacheBackend:
+    """Cache entries in a SQLite file shared by every worker process."""
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS ai_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, now):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at FROM ai_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE ai_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return row
+
+    def set(self, key, value, expires_at, now):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO ai_cache (key, value, expires_at, accessed_at)"
+            " VALUES (?, ?, ?, ?)", (key, value, expires_at, now))
+        conn.execute("DELETE FROM ai_cache WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "DELETE FROM ai_cache WHERE key IN (SELECT key FROM ai_cache"
+            " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+
+class ResponseCache:
+    """Bounded LRU with per-entry TTL and optional shared backend."""
+
+    def __init__(self, max_entries=1024, ttl=3600, backend=None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls):
+        max_entries = int(os.getenv('AI_CACHE_SIZE', '1024'))
+        ttl = float(os.getenv('AI_CACHE_TTL', '3600'))
+        path = os.getenv('AI_CACHE_PATH')
+        backend = None
+        if path and max_entries > 0:
+            try:
+                backend = SqliteCacheBackend(path, max_entries)
+            except sqlite3.Error as e:
+                log.warning("AI cache: shared backend at %s unavailable (%s), using memory only", path, e)
+        return cls(max_entries=max_entries, ttl=ttl, backend=backend)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, prompt, context=""):
+        """Return a cached answer, or ``None`` on a miss."""
+        if not self.enabled:
+            return None
+        answer = self.peek(cache_key(prompt, context))
+        with self._lock:
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return answer
+
+    def peek(self, key):
+        """Look up an already hashed key without touching the hit/miss counters."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    return entry[0]
+                del self._entries[key]
+        if self.backend is not None:
+            try:
+                row = self.backend.get(key, now)
+            except sqlite3.Error:
+                row = None
+            if row is not None:
+                with self._lock:
+                    self._store(key, row[0], row[1])
+                return row[0]
+        return None
+
+    def set(self, prompt, context, answer):
+        if not self.enabled:
+            return
+        key = cache_key(prompt, context)
+        now = self._clock()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._store(key, answer, expires_at)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, answer, expires_at, now)
+            except sqlite3.Error:
+                pass
+
+    def _store(self, key, answer, expires_at):
+        self._entries[key] = (answer, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'shared': self.backend is not None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache.from_env()
@@ -0,0 +1,168 @@
+"""
+Request coalescing ("single-flight") for identical in-flight AI queries.
+
+When many users ask the same popular question at once, only the first
+request calls Gemini; concurrent identical requests in the same worker wait
+for that call and share its answer. With a shared SQLite cache the leader
+also takes a short lease, so requests in *other* workers poll the shared
+cache for the answer instead of calling upstream themselves. If the lease
+disappears without an answer (the leader failed), the next poll takes over
+as leader instead of waiting out the lease.
+"""
+import sqlite3
+import threading
+import time
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SqliteLease:
+    """Cross-process lease on a key, stored next to the shared response cache."""
+
+    def __init__(self, path, ttl=30.0):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS ai_inflight (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key):
+        now = time.time()
+        conn = self._connection()
+        conn.execute("DELETE FROM ai_inflight WHERE key = ? AND expires_at <= ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO ai_inflight (key, expires_at) VALUES (?, ?)", (key, now + self.ttl))
+        return cursor.rowcount == 1
+
+    def release(self, key):
+        self._connection().execute("DELETE FROM ai_inflight WHERE key = ?", (key,))
+
+    def held(self, key):
+        """Whether an unexpired lease on ``key`` exists."""
+        row = self._connection().execute(
+            "SELECT 1 FROM ai_inflight WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return row is not None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its outcome.
+
+    ``lease`` and ``lookup`` enable cross-worker coalescing: when another
+    process holds the lease for a key, ``lookup(key)`` is polled until it
+    returns a result, the lease is released without one (this worker then
+    takes the lease and calls upstream itself), or ``max_wait`` seconds
+    pass (default: the lease TTL).
+    """
+
+    def __init__(self, lease=None, lookup=None, poll_interval=0.05, max_wait=None):
+        self.lease = lease
+        self.lookup = lookup
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.coalesced_remote = 0
+
+    def do(self, key, fn):
+        """Return ``fn()``, or the result of an identical call already running."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._lead(key, fn)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _lead(self, key, fn):
+        if self.lease is None or self.lookup is None:
+            return self._call_upstream(fn)
+        max_wait = self.lease.ttl if self.max_wait is None else min(self.max_wait, self.lease.ttl)
+        deadline = time.monotonic() + max_wait
+        while True:
+            try:
+                acquired = self.lease.acquire(key)
+            except sqlite3.Error:
+                return self._call_upstream(fn)
+            if acquired:
+                try:
+                    return self._call_upstream(fn)
+                finally:
+                    try:
+                        self.lease.release(key)
+                    except sqlite3.Error:
+                        pass
+
+            # Another worker is asking the same question; wait for its answer
+            result = self._wait_for_remote(key, deadline)
+            if result is not None:
+                with self._lock:
+                    self.coalesced_remote += 1
+                return result
+            if time.monotonic() >= deadline:
+                return self._call_upstream(fn)
+            # The lease went away without an answer (the leader failed): take over
+
+    def _wait_for_remote(self, key, deadline):
+        """Poll for another worker's answer until it arrives, its lease is gone, or ``deadline``."""
+        while time.monotonic() < deadline:
+            result = self.lookup(key)
+            if result is not None:
+                return result
+            try:
+                held = self.lease.held(key)
+            except sqlite3.Error:
+                held = True
+            if not held:
+                # The leader may have stored its answer just before releasing
+                return self.lookup(key)
+            time.sleep(self.poll_interval)
+        return None
+
+    def _call_upstream(self, fn):
+        with self._lock:
+            self.upstream_calls += 1
+        return fn()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'upstream_calls': self.upstream_calls,
+                'coalesced_local': self.coalesced,
+                'coalesced_remote': self.coalesced_remote,
+                'upstream_calls_saved': self.coalesced + self.coalesced_remote,
+                'cross_worker': self.lease is not None,
+            }
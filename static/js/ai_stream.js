@@ -0,0 +1,59 @@
+// Streams an AI coach answer from /api/chat/stream (Server-Sent Events over POST).
+// onText is called with the full answer so far each time a chunk arrives and
+// the optional onDone with the final event's data (e.g. the conversation_id);
+// the promise resolves with the complete answer, or rejects if the server
+// sends an error event partway through.
+async function streamFitnessAI(payload, onText, onDone) {
+    const response = await fetch('/api/chat/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream'
+        },
+        body: JSON.stringify(payload)
+    });
+
+    if (!response.ok) {
+        let message = 'Something went wrong. Please try again.';
+        try {
+            message = (await response.json()).error || message;
+        } catch (e) { /* non-JSON error body */ }
+        throw new Error(message);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventName = 'message';
+            let data = '';
+            for (const line of rawEvent.split('\n')) {
+                if (line.startsWith('event: ')) eventName = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+
+            if (eventName === 'message' && data) {
+                answer += JSON.parse(data).text;
+                onText(answer);
+            } else if (eventName === 'done' && onDone) {
+                onDone(JSON.parse(data));
+            } else if (eventName === 'error') {
+                throw new Error(JSON.parse(data).error);
+            }
+        }
+    }
+
+    return answer;
+}
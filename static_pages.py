@@ -0,0 +1,179 @@
+"""
+Pre-rendered, precompressed delivery of static pages and assets.
+
+Most pages (Home, the workout sections, the day plans) are templates that
+take no variables, yet they went through Jinja on every hit and left the
+server uncompressed. Each one is now rendered once, kept in memory with
+gzip (and, when the ``brotli`` package is installed, brotli) variants and
+a strong ETag, and served with Cache-Control and 304 Not Modified. Files
+under /static get the same treatment, with a content hash added to their
+URLs so browsers can cache them for a year.
+
+Set ``STATIC_CACHE=0`` (or run Flask in debug mode) to render on every
+request while editing templates.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import namedtuple
+
+from flask import Response, render_template, request
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compressing tiny bodies costs more than it saves
+MIN_COMPRESS_SIZE = 512
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+PAGE_CACHE_CONTROL = 'public, max-age=300'
+ASSET_CACHE_CONTROL = 'public, max-age=3600'
+VERSIONED_ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+Asset = namedtuple('Asset', 'content_type digest variants')
+
+
+def build_asset(body, content_type, compress=True):
+    """Body plus its compressed variants, keyed by content coding ('' = identity)."""
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    variants = {'': body}
+    if compress and len(body) >= MIN_COMPRESS_SIZE and content_type.startswith(COMPRESSIBLE_TYPES):
+        compressed = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed['br'] = brotli.compress(body, quality=11)
+        for coding, data in compressed.items():
+            if len(data) < len(body):
+                variants[coding] = data
+    return Asset(content_type, digest, variants)
+
+
+def _accepted_codings(header):
+    """Content codings the client accepts, ignoring any with q=0."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.replace(' ', '').lower() in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag(asset, coding):
+    # Each representation gets its own strong tag, as byte-for-byte equality requires
+    return f'"{asset.digest}-{coding}"' if coding else f'"{asset.digest}"'
+
+
+def send_asset(asset, cache_control):
+    """Serve ``asset`` for the current request: pick an encoding, honour If-None-Match."""
+    accepted = _accepted_codings(request.headers.get('Accept-Encoding', ''))
+    coding = next((c for c in ('br', 'gzip') if c in asset.variants and c in accepted), '')
+
+    headers = {'Cache-Control': cache_control, 'ETag': _etag(asset, coding)}
+    if len(asset.variants) > 1:
+        headers['Vary'] = 'Accept-Encoding'
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and request.method in ('GET', 'HEAD'):
+        # Any variant's tag matches: they all carry the same content
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        if '*' in tags or tags & {_etag(asset, variant) for variant in asset.variants}:
+            return Response(status=304, headers=headers)
+
+    if coding:
+        headers['Content-Encoding'] = coding
+    return Response(asset.variants[coding], content_type=asset.content_type, headers=headers)
+
+
+class StaticPages:
+    """Templates without variables, rendered once and served from memory."""
+
+    def __init__(self, app):
+        self.app = app
+        self._pages = {}
+        self._lock = threading.Lock()
+        self.enabled = os.getenv('STATIC_CACHE', '1') != '0'
+
+    def page(self, template):
+        asset = self._pages.get(template)
+        if asset is None:
+            with self._lock:
+                asset = self._pages.get(template)
+                if asset is None:
+                    # Rendered in a request context of its own so url_for works
+                    # even when called from the warm-up thread
+                    with self.app.test_request_context('/'):
+                        html = render_template(template)
+                    asset = self._pages[template] = build_asset(html.encode('utf-8'), 'text/html; charset=utf-8')
+        return asset
+
+    def serve(self, template):
+        """Response for ``template``, or a fresh render while caching is off."""
+        if not self.enabled or self.app.debug:
+            return render_template(template)
+        return send_asset(self.page(template), PAGE_CACHE_CONTROL)
+
+    def prerender(self, templates):
+        for template in templates:
+            self.page(template)
+
+    def stats(self):
+        with self._lock:
+            pages = list(self._pages.values())
+        return {
+            'pages': len(pages),
+            'bytes': sum(len(page.variants['']) for page in pages),
+            'compressed_bytes': sum(min(len(data) for data in page.variants.values()) for page in pages),
+            'brotli': brotli is not None,
+        }
+
+
+class StaticAssets:
+    """Files under the static folder, cached with their compressed variants.
+
+    A file is re-read when its mtime changes, so deploys and local edits
+    show up without a restart.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        path = safe_join(self.folder, filename)
+        if path is None or not os.path.isfile(path):
+            raise NotFound()
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._assets.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, 'rb') as f:
+                body = f.read()
+            content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            if content_type.startswith('text/') or content_type == 'application/javascript':
+                content_type += '; charset=utf-8'
+            cached = (mtime, build_asset(body, content_type))
+            with self._lock:
+                self._assets[path] = cached
+        return cached[1]
+
+    def version(self, filename):
+        """Short content hash for cache-busting URLs, or None if the file is missing."""
+        try:
+            return self.get(filename).digest[:12]
+        except NotFound:
+            return None
+
+    def serve(self, filename):
+        asset = self.get(filename)
+        versioned = request.args.get('v') == asset.digest[:12]
+        return send_asset(asset, VERSIONED_ASSET_CACHE_CONTROL if versioned else ASSET_CACHE_CONTROL)
+
+    def stats(self):
+        with self._lock:
+            return {'assets': len(self._assets)}
@@ -0,0 +1,106 @@
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import app as fitai
+from admission import ConcurrencyLimiter, Overloaded, TokenBucketLimiter
+from single_flight import SingleFlight
+
+
+def test_limiter_rejects_beyond_queue():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=0, queue_timeout=0.01)
+    limiter.acquire()
+    with pytest.raises(Overloaded) as excinfo:
+        limiter.acquire()
+    assert excinfo.value.status == 503
+    limiter.release()
+    with limiter.slot():
+        assert limiter.stats()['active'] == 1
+    assert limiter.stats()['rejected_queue_full'] == 1
+
+
+def test_token_bucket_refills(clock):
+    bucket = TokenBucketLimiter(rate_per_minute=60, burst=2, clock=clock)
+    bucket.check('1.2.3.4')
+    bucket.check('1.2.3.4')
+    with pytest.raises(Overloaded) as excinfo:
+        bucket.check('1.2.3.4')
+    assert excinfo.value.status == 429
+    assert excinfo.value.retry_after == 1
+    bucket.check('5.6.7.8')
+    clock.now += 1
+    bucket.check('1.2.3.4')
+
+
+def test_saturated_ai_traffic_gets_fast_503(monkeypatch):
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=0, queue_timeout=0.01)
+    monkeypatch.setattr(fitai, 'ai_limiter', limiter)
+    monkeypatch.setattr(fitai, 'ai_rate_limiter', TokenBucketLimiter(rate_per_minute=0))
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    fitai.response_cache.clear()
+    limiter.acquire()  # a slow Gemini call is holding the only slot
+    try:
+        with fitai.app.test_client() as client:
+            response = client.post('/api/chat', json={'message': 'plan a deload week for my powerlifting block'})
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+            assert client.get('/health').status_code == 200
+    finally:
+        limiter.release()
+
+
+def test_client_id_ignores_spoofed_forwarded_entries():
+    with fitai.app.test_request_context(headers={'X-Forwarded-For': '6.6.6.6, 10.0.0.7'}):
+        assert fitai.ai_client_id() == '10.0.0.7'
+    with fitai.app.test_request_context(headers={'X-Forwarded-For': '7.7.7.7, 10.0.0.7'}):
+        assert fitai.ai_client_id() == '10.0.0.7'
+
+
+def test_coalesced_requests_are_admitted_before_waiting(monkeypatch):
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=0, queue_timeout=0.01)
+    flight = SingleFlight()
+    monkeypatch.setattr(fitai, 'ai_limiter', limiter)
+    monkeypatch.setattr(fitai, 'ai_flight', flight)
+    monkeypatch.setattr(fitai, 'ai_rate_limiter', TokenBucketLimiter(rate_per_minute=0))
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    fitai.response_cache.clear()
+    prompt = 'plan a deload week for my powerlifting block'
+    release = threading.Event()
+
+    def slow_leader():
+        # A Gemini call for the same question holds the only slot
+        with limiter.slot():
+            flight.do(fitai.cache_key(prompt, ''), lambda: release.wait(5) and 'deload')
+
+    leader = threading.Thread(target=slow_leader)
+    leader.start()
+    while flight.stats()['in_flight'] == 0:
+        time.sleep(0.01)
+    try:
+        start = time.monotonic()
+        with fitai.app.test_client() as client:
+            response = client.post('/api/ai_query', json={'user_prompt': prompt})
+        assert response.status_code == 503
+        assert time.monotonic() - start < 1.0
+    finally:
+        release.set()
+        leader.join()
+
+
+def test_faq_stream_skips_admission(monkeypatch):
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=0, queue_timeout=0.01)
+    monkeypatch.setattr(fitai, 'ai_limiter', limiter)
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    limiter.acquire()  # a slow Gemini call is holding the only slot
+    try:
+        with fitai.app.test_client() as client:
+            response = client.post('/api/chat/stream', json={'message': 'Is creatine safe to take?'})
+            assert response.status_code == 200
+            assert 'event: done' in response.get_data(as_text=True)
+        assert limiter.stats()['active'] == 1
+    finally:
+        limiter.release()
@@ -0,0 +1,121 @@
+import sys
+import os
+import types
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ai_client
+from admission import TokenBucketLimiter
+
+
+class FakeModel:
+    created = 0
+
+    def __init__(self, model_name, system_instruction=None):
+        FakeModel.created += 1
+        self.system_instruction = system_instruction
+
+    def generate_content(self, prompt, **kwargs):
+        return types.SimpleNamespace(text=f"echo: {prompt}")
+
+
+def test_model_is_built_once_with_system_instruction(monkeypatch):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    monkeypatch.setattr(ai_client.genai, 'configure', lambda **kwargs: None)
+    monkeypatch.setattr(ai_client.genai, 'GenerativeModel', FakeModel)
+    FakeModel.created = 0
+    client = ai_client.FitnessAIClient()
+
+    assert client.generate('squats?').text == 'echo: squats?'
+    assert client.generate('lunges?').text == 'echo: lunges?'
+    assert FakeModel.created == 1
+    assert client.model().system_instruction == ai_client.SYSTEM_PROMPT
+
+    stats = client.stats()
+    assert stats['calls'] == 2
+    assert stats['cold_call_seconds'] is not None
+    assert stats['warm_p99_seconds'] is not None
+
+
+def test_missing_key_is_reported(monkeypatch):
+    monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+    client = ai_client.FitnessAIClient()
+    assert not client.configured
+
+
+def test_chat_stream_sends_server_sent_events(monkeypatch):
+    import app as fitai
+
+    class StreamingModel(FakeModel):
+        def generate_content(self, prompt, stream=False, **kwargs):
+            return iter([types.SimpleNamespace(text='Do '), types.SimpleNamespace(text='planks.')])
+
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    monkeypatch.setattr(ai_client.genai, 'configure', lambda **kwargs: None)
+    monkeypatch.setattr(ai_client.genai, 'GenerativeModel', StreamingModel)
+    monkeypatch.setattr(fitai, 'fitness_ai', ai_client.FitnessAIClient())
+    fitai.response_cache.clear()
+
+    with fitai.app.test_client() as client:
+        response = client.post('/api/chat/stream', json={'message': 'core workout for runners'})
+        body = response.get_data(as_text=True)
+
+    assert response.mimetype == 'text/event-stream'
+    assert body.startswith('data: {"text": "Do "}\n\n')
+    assert 'data: {"text": "planks."}\n\n' in body
+    assert 'event: done\ndata: {"status": "success", "conversation_id": ' in body
+
+
+def test_chat_stream_failure_sends_error_event(monkeypatch):
+    import app as fitai
+
+    class FailingModel(FakeModel):
+        def generate_content(self, prompt, stream=False, **kwargs):
+            yield types.SimpleNamespace(text='Do ')
+            raise ConnectionError("stream dropped")
+
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    monkeypatch.setattr(ai_client.genai, 'configure', lambda **kwargs: None)
+    monkeypatch.setattr(ai_client.genai, 'GenerativeModel', FailingModel)
+    monkeypatch.setattr(fitai, 'fitness_ai', ai_client.FitnessAIClient())
+    fitai.response_cache.clear()
+    recorded = []
+    monkeypatch.setattr(fitai.conversations, 'record', lambda *args: recorded.append(args))
+    monkeypatch.setattr(fitai, 'ai_rate_limiter', TokenBucketLimiter(rate_per_minute=0))
+
+    with fitai.app.test_client() as client:
+        response = client.post('/api/chat/stream', json={'message': 'mobility drills for desk workers'})
+        body = response.get_data(as_text=True)
+
+    assert body.startswith('data: {"text": "Do "}\n\n')
+    assert 'event: error\n' in body
+    assert 'event: done' not in body
+    assert fitai.ERROR_ANSWER not in body.split('event: error')[0]
+    assert recorded == []
+
+
+def test_stream_disconnect_is_no_verdict_on_gemini(monkeypatch, clock):
+    import app as fitai
+    from resilience import CircuitBreaker
+
+    class StreamingModel(FakeModel):
+        def generate_content(self, prompt, stream=False, **kwargs):
+            return iter([types.SimpleNamespace(text='Do '), types.SimpleNamespace(text='planks.')])
+
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    monkeypatch.setattr(ai_client.genai, 'configure', lambda **kwargs: None)
+    monkeypatch.setattr(ai_client.genai, 'GenerativeModel', StreamingModel)
+    monkeypatch.setattr(fitai, 'fitness_ai', ai_client.FitnessAIClient())
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    monkeypatch.setattr(fitai, 'ai_breaker', breaker)
+    breaker.record_failure()
+    clock.now += 30
+
+    # The browser goes away during the half-open trial call
+    stream = fitai.stream_fitness_ai('core workout for runners')
+    assert next(stream) == 'Do '
+    stream.close()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # The next request still gets to make the trial call
+    assert ''.join(fitai.stream_fitness_ai('core workout for runners')) == 'Do planks.'
+    assert breaker.state == CircuitBreaker.CLOSED
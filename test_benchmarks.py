@@ -0,0 +1,22 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.harness import load_baseline, measure, regressions, save_baseline
+
+
+def test_measure_reports_throughput_and_percentiles():
+    result = measure('noop', lambda: None, min_time=0.01, warmup=0, min_ops=50)
+    assert result.ops >= 50
+    assert result.ops_per_sec > 0
+    assert result.p50_us <= result.p90_us <= result.p99_us
+
+
+def test_regressions_are_flagged_against_a_saved_baseline(tmp_path):
+    path = str(tmp_path / 'baseline.json')
+    baseline_run = [measure('case', lambda: None, min_time=0.01)._replace(ops_per_sec=1000.0)]
+    save_baseline(path, baseline_run)
+    baseline = load_baseline(path)
+
+    assert regressions([baseline_run[0]._replace(ops_per_sec=850.0)], baseline, 0.2) == []
+    assert regressions([baseline_run[0]._replace(ops_per_sec=700.0)], baseline, 0.2) == [('case', 0.7)]
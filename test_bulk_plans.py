@@ -0,0 +1,47 @@
+import sys
+import os
+import io
+import json
+import subprocess
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bulk_plans import run
+
+HEADER = "id,age,height,weight,goal,duration,diet_type,gender,activity_level,health_conditions\n"
+ROWS = [f"m{i},{25 + i},170,{60 + i},weight loss,4,weight loss,female,moderate,Diabetes;Asthma\n" for i in range(9)]
+
+
+def plan(text, **kwargs):
+    out = io.StringIO()
+    rows, errors = run(io.StringIO(text), out, workers=2, chunk_size=2, **kwargs)
+    return rows, errors, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_rows_are_planned_in_input_order():
+    rows, errors, records = plan(HEADER + ''.join(ROWS))
+    assert (rows, errors) == (9, 0)
+    assert [record['id'] for record in records] == [f'm{i}' for i in range(9)]
+    assert records[0]['routine'] and len(records[0]['diet']) == 7
+    assert records[0]['diet']['Day 1']['Health Notes']
+
+
+def test_unordered_output_covers_every_row_and_reports_bad_ones():
+    bad = "m-bad,thirty,170,60,weight loss,4,weight loss,female,moderate,\n"
+    rows, errors, records = plan(HEADER + ''.join(ROWS) + bad, ordered=False)
+    assert (rows, errors) == (10, 1)
+    assert {record['id'] for record in records} == {f'm{i}' for i in range(9)} | {'m-bad'}
+    assert [record['line'] for record in records if 'error' in record] == [11]
+
+
+def test_plans_match_a_second_run():
+    _, _, first = plan(HEADER + ''.join(ROWS))
+    _, _, second = plan(HEADER + ''.join(ROWS), ordered=False)
+    assert sorted(first, key=lambda r: r['line']) == sorted(second, key=lambda r: r['line'])
+
+
+def test_workers_fork_without_the_flask_app():
+    # The app starts a logging thread and opens SQLite handles on import
+    code = "import sys, threading, bulk_plans; print('app' in sys.modules, threading.active_count())"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.stdout.split() == ['False', '1']
@@ -0,0 +1,67 @@
+import sys
+import os
+import random
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import WeeklyDietPlan, app, output
+from benchmarks.bench_generate import legacy_output
+from catalogs import MEAL_TYPES, diet_catalog, exercise_catalog
+
+
+def test_output_matches_pandas_implementation():
+    for intensity in (40, 50, 60, 70):
+        random.seed(intensity)
+        expected = legacy_output(intensity)
+        random.seed(intensity)
+        assert output(intensity) == expected
+        assert output(intensity, random.Random(intensity)) == legacy_output(intensity, random.Random(intensity))
+
+
+def test_catalog_is_parsed_once():
+    first = exercise_catalog.get()
+    assert exercise_catalog.get() is first
+    assert all(isinstance(row, tuple) for row in first.by_category['warmup'])
+
+
+def test_week_is_drawn_from_matching_pools():
+    index = diet_catalog.get()
+    week = index.sample_days('weight_loss', 7)
+    assert week.shape == (7, len(MEAL_TYPES))
+    for column, meal_type in enumerate(MEAL_TYPES):
+        allowed = set(index.labels[index.pool('weight_loss', meal_type)])
+        assert set(week[:, column]) <= allowed
+
+
+def test_diet_plan_format():
+    plan = WeeklyDietPlan(30, 175, 70, 'weight loss', 4, 'weight loss', 'female', 'active', ['Diabetes']).plan
+    assert list(plan) == [f'Day {i}' for i in range(1, 8)]
+    for meals in plan.values():
+        assert list(meals) == list(MEAL_TYPES) + ['Health Notes']
+        assert all(meals[meal_type].endswith(' calories') for meal_type in MEAL_TYPES)
+
+
+def test_routine_skeletons_are_precomputed_per_intensity():
+    index = exercise_catalog.get()
+    assert set(index.skeletons) == {40, 50, 60, 70}
+    assert index.skeleton(60) is index.skeletons[60]
+    # Levels outside the standard set are built on demand
+    assert index.skeleton(45).intensity == 45
+
+
+def test_routine_api_returns_structured_sections():
+    client = app.test_client()
+    response = client.post('/api/routine', json={'weight': 70, 'height': 175})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['intensity'] == 70
+    assert [section['category'] for section in body['sections']] == ['warmup', 'exercise', 'cooldown']
+    for section in body['sections']:
+        for exercise in section['exercises']:
+            if not exercise['duration_based']:
+                assert exercise['reps_min'] <= exercise['reps'] <= exercise['reps_max']
+
+    assert client.get('/api/routine?weight=70&height=175').get_json()['intensity'] == 70
+    assert client.get('/api/routine?weight=heavy&height=175').status_code == 400
+    assert client.get('/api/routine?weight=nan&height=175').status_code == 400
+    assert client.post('/api/routine', json={'weight': 70, 'height': float('inf')}).status_code == 400
+
@@ -0,0 +1,100 @@
+import sys
+import os
+import io
+import time
+import types
+import zipfile
+from concurrent.futures import Future
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import app as fitai
+import certificate_jobs
+from certificate_jobs import (TOO_SLOW, CertificateJobs, ExtractionError, JobTable, extract_conditions,
+                              iter_docx_text)
+
+DOCUMENT_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+    '<w:p><w:r><w:t>Diagnosis: high blood</w:t></w:r><w:r><w:t xml:space="preserve"> pressure</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>Adrenal panel normal.</w:t></w:r><w:r><w:tab/><w:t>Type 2 diabetes.</w:t></w:r></w:p>'
+    '</w:body></w:document>'
+)
+
+
+def make_docx(document_xml=DOCUMENT_XML):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('word/document.xml', document_xml)
+    return buffer.getvalue()
+
+
+def test_docx_text_is_read_paragraph_by_paragraph(tmp_path):
+    path = tmp_path / 'note.docx'
+    path.write_bytes(make_docx())
+    assert list(iter_docx_text(str(path))) == [
+        'Diagnosis: high blood pressure\n',
+        'Adrenal panel normal. Type 2 diabetes.\n',
+    ]
+    assert extract_conditions(str(path), 'docx', cpu_seconds=5) == ['Diabetes', 'High Blood Pressure']
+
+
+def test_damaged_documents_raise_extraction_error(tmp_path):
+    path = tmp_path / 'note.docx'
+    path.write_bytes(b'not a zip file')
+    with pytest.raises(ExtractionError):
+        extract_conditions(str(path), 'docx', cpu_seconds=5)
+    path = tmp_path / 'note.pdf'
+    path.write_bytes(b'%PDF-1.4 truncated')
+    with pytest.raises(ExtractionError):
+        extract_conditions(str(path), 'pdf', cpu_seconds=5)
+
+
+def test_docx_upload_returns_job_that_can_be_polled():
+    with fitai.app.test_client() as client:
+        response = client.post('/upload_medical_certificate',
+                               data={'medical_certificate': (io.BytesIO(make_docx()), 'note.docx')},
+                               content_type='multipart/form-data')
+        assert response.status_code == 202
+        job_id = response.get_json()['job_id']
+
+        deadline = time.monotonic() + 30
+        while True:
+            job = client.get(f'/upload_medical_certificate/jobs/{job_id}').get_json()
+            if job['status'] != 'pending' or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        assert job['status'] == 'done'
+        assert job['health_conditions'] == ['Diabetes', 'High Blood Pressure']
+
+        assert client.get('/upload_medical_certificate/jobs/unknown').status_code == 404
+
+
+def test_stuck_job_fails_at_its_deadline_and_frees_its_slot(tmp_path):
+    jobs = CertificateJobs(JobTable(str(tmp_path / 'jobs.sqlite3')), max_pending=1, wall_seconds=0.05)
+    stuck = Future()  # a pool process that never answers
+    jobs._executor = lambda: types.SimpleNamespace(submit=lambda *args: stuck)
+    job_id = jobs.submit([make_docx()], 'docx')
+
+    deadline = time.monotonic() + 5
+    while jobs.get(job_id)['status'] == 'pending' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert jobs.get(job_id) == {'status': 'failed', 'health_conditions': [], 'error': TOO_SLOW}
+    assert jobs.stats()['pending'] == 0 and jobs.stats()['timed_out'] == 1
+
+    # A late answer doesn't overwrite the result or free the slot twice
+    stuck.set_result(['Diabetes'])
+    assert jobs.get(job_id)['status'] == 'failed'
+    assert jobs.stats()['pending'] == 0 and jobs.stats()['completed'] == 0
+
+
+def test_extraction_stops_at_the_wall_clock_limit(tmp_path, monkeypatch):
+    def waiting(path):
+        time.sleep(5)  # blocked, so the CPU limit never fires
+        yield ''
+    monkeypatch.setitem(certificate_jobs.EXTRACTORS, 'docx', waiting)
+    start = time.monotonic()
+    with pytest.raises(ExtractionError, match=TOO_SLOW):
+        extract_conditions(str(tmp_path / 'note.docx'), 'docx', cpu_seconds=5, wall_seconds=0.05)
+    assert time.monotonic() - start < 1
@@ -0,0 +1,40 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conversations import ConversationStore, estimate_tokens
+
+
+def test_context_stays_within_budget():
+    store = ConversationStore(context_tokens=200)
+    conversation = store.get()
+    for turn in range(50):
+        store.record(conversation, f"Question {turn}: " + "how do I squat deeper? " * 10,
+                     f"Answer {turn}. " + "Work on ankle mobility. " * 20)
+        _, context = store.prepare(conversation, "next question", "User context: Weight: 70kg")
+        assert estimate_tokens(context) <= 200
+
+    assert context.startswith("User context: Weight: 70kg")
+    assert "Earlier in this conversation:" in context
+    assert "Answer 49." in context
+    assert "Question 0:" not in context
+
+
+def test_long_messages_are_clipped():
+    store = ConversationStore(message_tokens=16)
+    message, _ = store.prepare(store.get(), "x" * 1000)
+    assert estimate_tokens(message) <= 16
+
+
+def test_sessions_are_lru_bounded_and_expire(clock):
+    store = ConversationStore(max_sessions=2, idle_ttl=60, clock=clock)
+    first = store.get()
+    store.get()
+    store.get()
+    assert store.stats()['evicted'] == 1
+    assert store.get(first.id) is not first
+
+    clock.now += 61
+    store.get()
+    assert store.stats()['expired'] == 2
+    assert store.stats()['sessions'] == 1
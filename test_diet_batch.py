@@ -0,0 +1,58 @@
+import sys
+import os
+import json
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from app import WeeklyDietPlan, app
+from catalogs import MEAL_TYPES
+from diet_batch import bmr, daily_calories
+
+PROFILES = [
+    {'age': 30, 'height': 175, 'weight': 70, 'gender': 'female', 'goal': 'weight loss',
+     'diet_type': 'weight loss', 'activity_level': 'moderate', 'health_conditions': ['Diabetes']},
+    {'age': 45, 'height': 182, 'weight': 90, 'gender': 'male', 'goal': 'weight gain',
+     'diet_type': 'vegetarian', 'activity_level': 'active'},
+]
+
+
+def test_vectorized_calories_match_single_plans():
+    values = bmr(np.array([70.0, 90.0]), np.array([175.0, 182.0]), np.array([30.0, 45.0]), np.array([False, True]))
+    calories = daily_calories(values, ['weight loss', 'weight gain'])
+    for profile, expected_bmr, expected_calories in zip(PROFILES, values, calories):
+        plan = WeeklyDietPlan(profile['age'], profile['height'], profile['weight'], profile['goal'], 4,
+                              profile['diet_type'], profile['gender'], profile['activity_level'])
+        assert plan.bmr == expected_bmr
+        assert plan.daily_calories == expected_calories
+
+
+def test_batch_returns_structured_plans():
+    response = app.test_client().post('/api/diet/batch', json={'profiles': PROFILES, 'seed': 3})
+    assert response.status_code == 200
+    plans = response.get_json()['plans']
+    assert [plan['index'] for plan in plans] == [0, 1]
+    assert plans[0]['diet_type'] == 'diabetic_friendly' and 'health_notes' in plans[0]
+    assert 'health_notes' not in plans[1]
+    assert set(plans[1]['plan']) == {f'Day {day}' for day in range(1, 8)}
+    assert set(plans[1]['plan']['Day 1']) == set(MEAL_TYPES)
+    # Seeded batches are reproducible
+    again = app.test_client().post('/api/diet/batch', json={'profiles': PROFILES, 'seed': 3})
+    assert again.get_json()['plans'] == plans
+
+
+def test_batch_streams_ndjson_on_request():
+    response = app.test_client().post('/api/diet/batch', json=PROFILES * 3,
+                                      headers={'Accept': 'application/x-ndjson'})
+    assert response.content_type == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [plan['index'] for plan in lines] == list(range(6))
+
+
+def test_invalid_profiles_are_rejected_up_front():
+    client = app.test_client()
+    broken = dict(PROFILES[0], weight='heavy')
+    response = client.post('/api/diet/batch', json=[PROFILES[1], broken])
+    assert response.status_code == 400
+    assert 'profile 1' in response.get_json()['error']
+    assert client.post('/api/diet/batch', json=[]).status_code == 400
@@ -0,0 +1,40 @@
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as fitai
+
+
+def test_common_questions_are_answered_locally():
+    answerer = fitai.faq_answerer
+    assert "1.6-2.2 g of protein" in answerer.answer("How much protein should I eat per day?")
+    assert "Greek Yogurt" in answerer.answer("how many calories in greek yogurt")
+    assert answerer.answer("plan a deload week for my powerlifting block") is None
+
+
+def test_lookup_takes_milliseconds():
+    start = time.perf_counter()
+    for _ in range(100):
+        fitai.faq_answerer.answer("what should I eat after my workout")
+    assert (time.perf_counter() - start) / 100 < 0.005
+
+
+def test_faq_works_without_api_key(monkeypatch):
+    monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+    with fitai.app.test_client() as client:
+        response = client.post('/api/chat', json={'message': 'Is creatine safe to take?'})
+    assert "Creatine monohydrate" in response.get_json()['response']
+
+
+def test_unknown_qualifier_goes_to_the_llm():
+    answerer = fitai.faq_answerer
+    assert answerer.answer("What are the best exercises for abs?") is not None
+    assert answerer.answer("What are the best exercises for abs if I have a hernia?") is None
+    assert answerer.answer("How many reps of squats should I do for my knee injury?") is None
+
+
+def test_offline_answer_must_name_the_food():
+    answerer = fitai.faq_answerer
+    assert answerer.answer("How many calories are in pizza?", offline=True) is None
+    assert "Chapati" in answerer.answer("How many calories are in chapati?", offline=True)
@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from app import app
+from benchmarks.bench_meal_solver import synthetic_catalog
+from catalogs import DietIndex, diet_catalog
+from food_swaps import FoodSwaps, SwapIndex
+
+
+def test_nearest_matches_brute_force():
+    diet = DietIndex.from_frame(synthetic_catalog(400))
+    index = SwapIndex(diet)
+    scaled = diet.nutrients / diet.nutrients.std(axis=0)
+    for row, matches in zip((0, 17, 250), index.nearest([0, 17, 250], k=4)):
+        distances = np.linalg.norm(scaled - scaled[row], axis=1)
+        distances[row] = np.inf
+        assert [match for match, _ in matches] == list(np.argsort(distances)[:4])
+
+
+def test_filters_limit_candidates():
+    diet = DietIndex.from_frame(synthetic_catalog(400))
+    index = SwapIndex(diet)
+    mask = index.allowed(meal_type='Lunch', health_conditions=['Diabetes'])
+    for row, _ in index.nearest([3], k=10, mask=mask)[0]:
+        assert diet.meal_types[row] == 'Lunch'
+        assert diet.nutrients[row, 3] <= 30
+
+
+def test_swap_api_and_chat():
+    client = app.test_client()
+    body = client.get('/api/diet/swap?food=Oatmeal with Milk - 300 calories&k=2').get_json()
+    assert body['food']['food_item'] == 'Oatmeal with Milk'
+    assert len(body['swaps']) == 2
+    assert all(swap['food_item'] != 'Oatmeal with Milk' for swap in body['swaps'])
+    assert client.get('/api/diet/swap?food=Unicorn Steak').status_code == 404
+
+    reply = client.post('/api/chat', json={'message': 'What can I have instead of Scrambled Eggs?'}).get_json()
+    assert reply['response'].startswith('Foods closest to **Scrambled Eggs**')
+
+
+def test_chat_leaves_unsupported_constraints_to_the_llm():
+    swaps = FoodSwaps(diet_catalog)
+    assert swaps.answer("something like Grilled Chicken") is not None
+    assert swaps.answer("something like Grilled Chicken but vegetarian") is None
+    assert swaps.answer("Can I replace chapati? I am vegan") is None
+    assert swaps.answer("instead of Greek Yogurt since I am lactose intolerant") is None
+    assert swaps.answer("instead of Greek Yogurt, I have high blood pressure") is None
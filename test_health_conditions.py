@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from health_conditions import (
+    detect_health_conditions_from_text, scan_health_conditions, scan_health_conditions_stream,
+)
+
+
+def test_detects_conditions_in_table_order():
+    text = "Patient has anxiety. History of type 2 diabetes and hypertension."
+    assert detect_health_conditions_from_text(text) == ['Diabetes', 'High Blood Pressure', 'Anxiety']
+
+
+def test_empty_text():
+    assert detect_health_conditions_from_text('') == []
+    assert detect_health_conditions_from_text(None) == []
+
+
+def test_substrings_of_other_words_do_not_match():
+    assert detect_health_conditions_from_text("Adrenal function normal.") == []
+    assert detect_health_conditions_from_text("Resting heart rate 72 bpm.") == []
+    assert detect_health_conditions_from_text("Subscription: abpro wellness plan") == []
+    assert detect_health_conditions_from_text("Cancerous-looking mole ruled out, see dermatology") == []
+    assert detect_health_conditions_from_text("Rheumatoid factor negative; no arthritic changes") == []
+
+
+def test_whole_words_and_variants_match():
+    assert detect_health_conditions_from_text("BP: 150/95") == ['High Blood Pressure']
+    assert detect_health_conditions_from_text("Renal panel ordered") == ['Kidney Disease']
+    assert detect_health_conditions_from_text("Known asthmatic, uses inhaler") == ['Asthma']
+    assert detect_health_conditions_from_text("On levothyroxine for hypothyroidism") == ['Thyroid Disorder']
+    assert detect_health_conditions_from_text("Two benign tumors removed") == ['Cancer']
+
+
+def test_phrases_may_span_line_breaks():
+    assert detect_health_conditions_from_text("Diagnosis: high blood\npressure") == ['High Blood Pressure']
+
+
+def test_matches_report_offsets():
+    text = "No diabetes. Mild asthma."
+    matches = list(scan_health_conditions(text))
+    assert [(m.condition, m.keyword) for m in matches] == [('Diabetes', 'diabetes'), ('Asthma', 'asthma')]
+    assert [text[m.start:m.end] for m in matches] == ['diabetes', 'asthma']
+
+
+def test_stream_scan_matches_whole_text_scan_at_every_split():
+    text = ("Hx: type 2 diabetes, high blood pressure (BP 150/95), adrenal panel normal. " * 3
+            + "Mild asthma; renal function ok. Hypothyroidism treated.")
+    expected = list(scan_health_conditions(text))
+    for split in range(1, len(text)):
+        pieces = [text[i:i + split] for i in range(0, len(text), split)]
+        assert list(scan_health_conditions_stream(pieces)) == expected, split
+
+
+def test_stream_scan_does_not_report_keyword_extended_by_next_piece():
+    assert list(scan_health_conditions_stream(["Screened for cancer", "ous lesions"])) == []
@@ -0,0 +1,29 @@
+import sys
+import os
+import subprocess
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lazy_imports import LazyModule
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_module_is_imported_on_first_attribute_access():
+    module = LazyModule('colorsys')
+    assert not module.loaded
+    assert module.rgb_to_hsv(1, 0, 0) == (0.0, 1.0, 1)
+    assert module.loaded
+
+
+def test_static_routes_do_not_import_heavy_dependencies():
+    script = (
+        "import sys, app\n"
+        "with app.app.test_client() as client:\n"
+        "    for path in ('/', '/workout', '/GP', '/D1', '/health'):\n"
+        "        assert client.get(path).status_code == 200\n"
+        "print(','.join(m for m in ('pandas', 'numpy', 'google.generativeai') if m in sys.modules))\n"
+    )
+    env = dict(os.environ, WARMUP='0')
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
@@ -0,0 +1,44 @@
+import sys
+import os
+import json
+import logging
+import queue
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_config import JsonFormatter, NonBlockingQueueHandler, SamplingFilter
+
+
+def make_record(msg, *args, **extra):
+    record = logging.LogRecord('fitai', logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_user_text_and_secrets_are_redacted(monkeypatch):
+    monkeypatch.setenv('GEMINI_API_KEY', 'super-secret-key-123')
+    record = make_record("calling %s with api_key=%s", 'gemini', 'super-secret-key-123',
+                         user_message='I have diabetes', error='token=abc123 rejected')
+    entry = json.loads(JsonFormatter().format(record))
+    assert 'super-secret' not in json.dumps(entry)
+    assert entry['msg'] == 'calling gemini with api_key=[REDACTED]'
+    assert entry['user_message'] == '<15 chars>'
+    assert entry['error'] == 'token=[REDACTED] rejected'
+
+    entry = json.loads(JsonFormatter(log_prompts=True).format(record))
+    assert entry['user_message'] == 'I have diabetes'
+
+
+def test_sampled_messages_are_thinned_per_message():
+    sampler = SamplingFilter(rate=0.25)
+    kept = [sampler.filter(make_record("chat received", sampled=True)) for _ in range(100)]
+    assert sum(kept) == 25
+    assert sampler.filter(make_record("other event", sampled=True))
+    assert all(sampler.filter(make_record("chat failed")) for _ in range(10))
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(make_record("busy"))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
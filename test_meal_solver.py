@@ -0,0 +1,68 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from app import WeeklyDietPlan
+from benchmarks.bench_meal_solver import synthetic_catalog
+from catalogs import DietIndex, diet_catalog
+from meal_solver import CALORIE_TOLERANCE, MealSolver, macro_split, solver_for
+
+
+def test_days_land_within_tolerance_on_a_large_catalog():
+    solver = MealSolver(DietIndex.from_frame(synthetic_catalog(3000)), 'weight_loss', macro_split('weight loss'))
+    rng = np.random.default_rng(0)
+    for target in (1400, 1900, 2600):
+        solution = solver.solve(target, rng)
+        assert solution.within_tolerance
+        assert abs(solution.calories - target) <= target * CALORIE_TOLERANCE
+        assert len(solution.rows) == 6
+
+
+def test_excluded_items_are_left_out():
+    index = DietIndex.from_frame(synthetic_catalog(600))
+    solver = MealSolver(index, 'maintenance', macro_split('maintenance'))
+    days = [solver.solve(2000).rows]
+    for _ in range(13):
+        days.append(solver.solve(2000, exclude=days[-1:]).rows)
+    for yesterday, today in zip(days, days[1:]):
+        assert not np.isin(today, yesterday).any()
+
+
+def test_small_catalog_gets_the_closest_day():
+    # The bundled catalog cannot reach most targets with one item per meal
+    solver = solver_for(diet_catalog.get(), 'weight_loss', 'weight loss')
+    assert solver is solver_for(diet_catalog.get(), 'weight_loss', 'weight loss')
+    low, high = solver.solve(100), solver.solve(5000)
+    assert low.calories <= high.calories
+    assert not high.within_tolerance
+    # Mid-Morning and Afternoon Snack fall back to every weight loss food,
+    # but still never take an item another slot has
+    assert len(set(high.rows)) == len(high.rows)
+
+
+def test_health_limits_apply_to_every_slot():
+    plan = WeeklyDietPlan(30, 175, 70, 'weight loss', 4, 'weight loss', 'female', 'moderate', ['Diabetes'], seed=3)
+    for day in plan.solve_week(1):
+        assert not any(label.startswith('Oatmeal') for label in day.labels)  # 45 g of carbs
+
+
+def test_weekly_plan_weeks_are_generated_independently():
+    plan = WeeklyDietPlan(30, 175, 70, 'weight loss', 12, 'weight loss', 'female', 'moderate', seed=11)
+    weeks = list(plan.iter_weeks())
+    assert len(weeks) == 12
+    assert plan.week(9) == weeks[8]
+    assert list(weeks[11]) == [f'Day {day}' for day in range(78, 85)]
+
+
+def test_days_avoid_the_items_of_recent_days():
+    for seed in range(10):
+        plan = WeeklyDietPlan(30, 175, 70, 'weight loss', 12, 'weight loss', 'female', 'moderate', seed=seed)
+        days = [tuple(day.labels) for number in (1, 2) for day in plan.solve_week(number)]
+        # The bundled catalog has only a few ways to fill a day, but no day
+        # repeats the one before, across the week boundary too, and the
+        # odd days don't simply alternate with the even ones
+        assert all(yesterday != today for yesterday, today in zip(days, days[1:]))
+        assert len(set(days[0:7:2])) > 1
+        assert all(day.within_tolerance for day in plan.solve_week(1))
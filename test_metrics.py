@@ -0,0 +1,45 @@
+import sys
+import os
+import io
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as fitai
+from metrics import Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram('demo_seconds', 'Demo.', ('route',), buckets=(0.1, 1))
+    latency.observe(0.05, 'home')
+    latency.observe(0.5, 'home')
+    latency.observe(5, 'home')
+    text = registry.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{route="home",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="home",le="1"} 2' in text
+    assert 'demo_seconds_bucket{route="home",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="home"} 3' in text
+
+
+def test_recording_costs_microseconds():
+    histogram = Registry().histogram('overhead_seconds', 'Overhead.', ('endpoint', 'method', 'status'))
+    start = time.perf_counter()
+    for _ in range(10000):
+        histogram.observe(0.003, 'generate', 'POST', '200')
+    assert (time.perf_counter() - start) / 10000 < 20e-6
+
+
+def test_metrics_endpoint_reports_routes_plans_and_uploads():
+    with fitai.app.test_client() as client:
+        client.post('/generate', data={'weight': '70', 'height': '175'})
+        client.post('/upload_medical_certificate',
+                    data={'medical_certificate': (io.BytesIO(b'Known asthmatic.'), 'note.txt')},
+                    content_type='multipart/form-data')
+        response = client.get('/metrics')
+    text = response.get_data(as_text=True)
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    assert 'fitai_http_request_duration_seconds_count{endpoint="generate",method="POST",status="200"}' in text
+    assert 'fitai_plan_generation_seconds_count{plan="routine"}' in text
+    assert 'fitai_upload_size_bytes_count{format="txt"}' in text
+    assert 'fitai_ai_cache{field="hits"}' in text
@@ -0,0 +1,109 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import WeeklyDietPlan, app, plan_cache
+from plan_cache import PlanCache, plan_seed
+
+DIET_FORM = {'age': '30', 'height': '175', 'weight': '70', 'goal': 'weight loss', 'duration': '4',
+             'diet_type': 'weight loss', 'gender': 'female', 'activity_level': 'moderate'}
+
+
+def test_seed_depends_on_profile_and_version():
+    assert plan_seed((70.0, 175.0)) == plan_seed((70.0, 175.0))
+    assert plan_seed((70.0, 175.0)) != plan_seed((71.0, 175.0))
+    assert plan_seed((70.0, 175.0), '1') != plan_seed((70.0, 175.0), '2')
+
+
+def test_cache_evicts_least_recently_used():
+    cache = PlanCache(max_entries=2)
+    cache.get_or_create('a', lambda: 1)
+    cache.get_or_create('b', lambda: 2)
+    cache.get_or_create('a', lambda: None)
+    cache.get_or_create('c', lambda: 3)
+    assert cache.get_or_create('a', lambda: 'rebuilt') == 1
+    assert cache.get_or_create('b', lambda: 'rebuilt') == 'rebuilt'
+    assert cache.stats()['evictions'] == 2
+
+
+def test_seeded_diet_plans_are_reproducible():
+    args = (30, 175, 70, 'weight loss', 4, 'weight loss', 'female', 'moderate')
+    assert WeeklyDietPlan(*args, seed=7).plan == WeeklyDietPlan(*args, seed=7).plan
+
+
+def test_repeat_plan_requests_are_cached_and_revalidated():
+    plan_cache.clear()
+    client = app.test_client()
+    first = client.post('/diet', data=DIET_FORM)
+    second = client.post('/diet', data=DIET_FORM)
+    assert first.status_code == second.status_code == 200
+    assert first.data == second.data
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert plan_cache.stats()['hits'] == 1
+
+    revalidated = client.get('/diet', query_string=DIET_FORM, headers={'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
+
+    reshuffled = client.post('/diet', data={**DIET_FORM, 'plan_version': '2'})
+    assert reshuffled.headers['ETag'] != first.headers['ETag']
+
+
+def test_generate_is_seeded_per_profile():
+    client = app.test_client()
+    first = client.post('/generate', data={'weight': '70', 'height': '175'})
+    again = client.get('/generate?weight=70&height=175', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_multi_week_plans_are_served_a_week_at_a_time():
+    client = app.test_client()
+    profile = {'age': 30, 'height': 175, 'weight': 70, 'goal': 'weight loss', 'duration': 12,
+               'diet_type': 'weight loss', 'gender': 'female', 'activity_level': 'moderate',
+               'health_conditions': ['Diabetes']}
+    created = client.post('/api/diet/plan', json=profile).get_json()
+    assert created['weeks'] == 12 and created['week'] == 1
+
+    plan_id = created['plan_id']
+    week = client.get(f'/api/diet/plan/{plan_id}?week=12').get_json()
+    assert [day['day'] for day in week['days']] == list(range(78, 85))
+    assert client.get(f'/api/diet/plan/{plan_id}?week=12').get_json() == week
+    # Week 1 of the API plan is the plan /diet shows for the same profile
+    assert created['days'][0]['meals'] == WeeklyDietPlan(
+        30, 175.0, 70.0, 'weight loss', 12, 'weight loss', 'female', 'moderate', ['Diabetes'],
+        seed=plan_seed((30, 175.0, 70.0, 'weight loss', 12, 'weight loss', 'female', 'moderate'), '')).plan['Day 1']
+
+    assert client.get(f'/api/diet/plan/{plan_id}?week=13').status_code == 400
+    assert client.get('/api/diet/plan/not-a-plan').status_code == 404
+
+
+def test_week_api_solves_only_the_requested_week(monkeypatch):
+    client = app.test_client()
+    profile = {'age': 30, 'height': 175, 'weight': 70, 'goal': 'weight gain', 'duration': 8,
+               'diet_type': 'weight gain', 'gender': 'male', 'activity_level': 'active'}
+    plan_id = client.post('/api/diet/plan', json=profile).get_json()['plan_id']
+    days = []
+    solve_day = WeeklyDietPlan.solve_day
+    monkeypatch.setattr(WeeklyDietPlan, 'solve_day',
+                        lambda plan, day, exclude=(): days.append(day) or solve_day(plan, day, exclude))
+    assert client.get(f'/api/diet/plan/{plan_id}?week=5').status_code == 200
+    # Plus the first day of week 6, which day 35 must not repeat
+    assert sorted(days) == list(range(29, 37))
+
+
+def test_non_finite_profiles_are_rejected():
+    client = app.test_client()
+    for weight in ('nan', 'inf', '-70'):
+        assert client.post('/diet', data={**DIET_FORM, 'weight': weight}).status_code == 400
+        response = client.post('/api/diet/plan', json={**DIET_FORM, 'weight': weight})
+        assert response.status_code == 400
+        assert 'argmin' not in response.get_json()['error']
+
+
+def test_health_conditions_must_be_a_list_of_names():
+    client = app.test_client()
+    profile = {**DIET_FORM, 'health_conditions': ['Diabetes']}
+    assert client.post('/api/diet/plan', json=profile).status_code == 200
+    for conditions in (5, 'Diabetes', [5], {'Diabetes': True}):
+        assert client.post('/api/diet/plan', json={**profile, 'health_conditions': conditions}).status_code == 400
+    assert client.post('/diet', data={**DIET_FORM, 'health_conditions': '["Diabetes"]'}).status_code == 200
+    assert client.post('/diet', data={**DIET_FORM, 'health_conditions': '5'}).status_code == 400
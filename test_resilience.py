@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+import app as fitai
+from resilience import CircuitBreaker, CircuitOpen, RetryPolicy
+
+
+def test_transient_errors_are_retried_within_budget(clock):
+    policy = RetryPolicy(timeout=10, max_retries=2, clock=clock, sleep=clock.sleep)
+    attempts = []
+
+    def flaky(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise api_exceptions.ServiceUnavailable("try again")
+        return "ok"
+
+    assert policy.call(flaky) == "ok"
+    assert len(attempts) == 3
+    assert all(timeout <= 10 for timeout in attempts)
+
+
+def test_permanent_errors_are_not_retried():
+    policy = RetryPolicy(timeout=10, max_retries=5)
+    attempts = []
+
+    def bad_request(timeout):
+        attempts.append(timeout)
+        raise api_exceptions.InvalidArgument("bad prompt")
+
+    with pytest.raises(api_exceptions.InvalidArgument):
+        policy.call(bad_request)
+    assert len(attempts) == 1
+
+
+def test_breaker_opens_then_half_opens(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    def down():
+        raise api_exceptions.ServiceUnavailable("down")
+
+    for _ in range(2):
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            breaker.call(down)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.call(lambda: "never called")
+
+    clock.now += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.call(lambda: "back") == "back"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_gives_degraded_answer_and_shows_in_health(monkeypatch, clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    monkeypatch.setattr(fitai, 'ai_breaker', breaker)
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    fitai.response_cache.clear()
+
+    with fitai.app.test_client() as client:
+        response = client.post('/api/ai_query', json={'user_prompt': 'plan a deload week for my powerlifting block'})
+        assert response.get_json()['response'] == fitai.DEGRADED_ANSWER
+        health = client.get('/health')
+        assert health.status_code == 200
+        assert health.get_json()['ai_breaker']['state'] == 'open'
@@ -0,0 +1,45 @@
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from response_cache import ResponseCache, SqliteCacheBackend
+
+
+def test_normalized_prompts_share_an_entry():
+    cache = ResponseCache(max_entries=10, ttl=60)
+    cache.set("Best exercises for abs?", "", "Planks.")
+    assert cache.get("  best   exercises for ABS ") == "Planks."
+    assert cache.get("Best exercises for abs?", "User context: Weight: 80kg") is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_lru_eviction_and_ttl(clock):
+    cache = ResponseCache(max_entries=2, ttl=60, clock=clock)
+    cache.set("a", "", "A")
+    cache.set("b", "", "B")
+    cache.get("a")
+    cache.set("c", "", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    clock.now += 61
+    assert cache.get("a") is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_shared_backend_between_caches(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    first = ResponseCache(max_entries=10, ttl=60, backend=SqliteCacheBackend(path, 10))
+    second = ResponseCache(max_entries=10, ttl=60, backend=SqliteCacheBackend(path, 10))
+    first.set("how much protein should I eat", "", "About 1.6 g/kg.")
+    assert second.get("How much protein should I eat?") == "About 1.6 g/kg."
+
+
+def test_memory_hit_is_fast():
+    cache = ResponseCache(max_entries=10, ttl=60)
+    cache.set("best exercises for abs", "", "Planks.")
+    start = time.perf_counter()
+    for _ in range(1000):
+        cache.get("best exercises for abs")
+    assert (time.perf_counter() - start) / 1000 < 0.001
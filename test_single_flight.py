@@ -0,0 +1,80 @@
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from single_flight import SingleFlight, SqliteLease
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow_answer():
+        calls.append(1)
+        release.wait(2)
+        return "Planks and dead bugs."
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('abs', slow_answer))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()['coalesced_local'] < 7:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["Planks and dead bugs."] * 8
+    assert flight.stats()['upstream_calls_saved'] == 7
+
+
+def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight()
+
+    def failing():
+        raise TimeoutError("upstream timed out")
+
+    with pytest.raises(TimeoutError):
+        flight.do('q', failing)
+    assert flight.do('q', lambda: "ok") == "ok"
+
+
+def test_other_worker_waits_for_the_lease_holder(tmp_path):
+    shared = {}
+    path = str(tmp_path / 'cache.sqlite3')
+    leader = SqliteLease(path)
+    follower = SingleFlight(lease=SqliteLease(path), lookup=shared.get, poll_interval=0.01)
+
+    assert leader.acquire('protein')
+    threading.Timer(0.05, lambda: shared.update(protein="1.6 g/kg")).start()
+    assert follower.do('protein', lambda: "called upstream") == "1.6 g/kg"
+    assert follower.stats()['coalesced_remote'] == 1
+    assert follower.stats()['upstream_calls'] == 0
+
+
+def test_follower_takes_over_when_the_leader_fails(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    leader = SqliteLease(path, ttl=3.0)
+    follower = SingleFlight(lease=SqliteLease(path, ttl=3.0), lookup={}.get, poll_interval=0.01)
+
+    assert leader.acquire('protein')
+    threading.Timer(0.1, leader.release, ('protein',)).start()
+    start = time.monotonic()
+    assert follower.do('protein', lambda: "called upstream") == "called upstream"
+    assert time.monotonic() - start < 1.0
+    assert follower.stats()['upstream_calls'] == 1
+
+
+def test_follower_wait_is_capped(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    assert SqliteLease(path).acquire('protein')
+    follower = SingleFlight(lease=SqliteLease(path), lookup={}.get, poll_interval=0.01, max_wait=0.2)
+    start = time.monotonic()
+    assert follower.do('protein', lambda: "called upstream") == "called upstream"
+    assert time.monotonic() - start < 1.0
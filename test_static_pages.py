@@ -0,0 +1,40 @@
+import sys
+import os
+import re
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as fitai
+from static_pages import build_asset
+
+
+def test_static_page_is_compressed_and_revalidated():
+    with fitai.app.test_client() as client:
+        plain = client.get('/workout')
+        gzipped = client.get('/workout', headers={'Accept-Encoding': 'gzip'})
+        not_modified = client.get('/workout', headers={'If-None-Match': gzipped.headers['ETag']})
+
+    assert plain.status_code == 200 and 'Content-Encoding' not in plain.headers
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert len(gzipped.data) < len(plain.data)
+    assert gzipped.headers['ETag'] != plain.headers['ETag']
+    assert gzipped.headers['Vary'] == 'Accept-Encoding'
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+
+def test_static_assets_get_versioned_urls_and_long_cache():
+    with fitai.app.test_client() as client:
+        html = client.get('/GP').get_data(as_text=True)
+        url = re.search(r'/static/css/theme\.css\?v=\w+', html).group(0)
+        versioned = client.get(url)
+        unversioned = client.get('/static/css/theme.css')
+        assert client.get('/static/../app.py').status_code == 404
+
+    assert versioned.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert unversioned.headers['Cache-Control'] == 'public, max-age=3600'
+    assert versioned.content_type == 'text/css; charset=utf-8'
+
+
+def test_small_or_binary_bodies_are_not_compressed():
+    assert list(build_asset(b'tiny', 'text/css').variants) == ['']
+    assert list(build_asset(b'\xff' * 4096, 'image/jpeg').variants) == ['']
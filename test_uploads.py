@@ -0,0 +1,49 @@
+import sys
+import os
+import io
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import app as fitai
+from uploads import UploadTooLarge, detect_charset, iter_text
+
+
+def test_detect_charset():
+    assert detect_charset('Diabète'.encode('utf-8')) == 'utf-8'
+    assert detect_charset('Diabète'.encode('latin-1')) == 'latin-1'
+    assert detect_charset('Diabète'.encode('utf-8-sig')) == 'utf-8-sig'
+    assert detect_charset('Diabète'.encode('utf-16')) == 'utf-16'
+    # A multi-byte character cut off by the chunk boundary is still UTF-8
+    assert detect_charset('é'.encode('utf-8')[:1]) == 'utf-8'
+
+
+def test_iter_text_decodes_characters_split_across_chunks():
+    text = 'Café crème, diabète. ' * 50
+    for charset in ('utf-8', 'utf-16', 'latin-1'):
+        assert ''.join(iter_text(io.BytesIO(text.encode(charset)), chunk_size=7)) == text
+
+
+def test_iter_text_enforces_the_size_limit():
+    with pytest.raises(UploadTooLarge):
+        list(iter_text(io.BytesIO(b'x' * 101), max_bytes=100, chunk_size=16))
+
+
+def upload(client, data, filename='report.txt'):
+    return client.post('/upload_medical_certificate',
+                       data={'medical_certificate': (io.BytesIO(data), filename)},
+                       content_type='multipart/form-data')
+
+
+def test_upload_detects_conditions_in_latin1_file():
+    with fitai.app.test_client() as client:
+        response = upload(client, "Patient: Zoë. Diagnosed with asthma and hypertension.".encode('latin-1'))
+    assert response.get_json()['health_conditions'] == ['High Blood Pressure', 'Asthma']
+
+
+def test_oversized_upload_is_rejected(monkeypatch):
+    monkeypatch.setitem(fitai.app.config, 'MAX_CONTENT_LENGTH', 1024)
+    with fitai.app.test_client() as client:
+        response = upload(client, b'diabetes ' * 1000)
+    assert response.status_code == 413
+    assert response.get_json()['success'] is False
@@ -0,0 +1,79 @@
+"""
+Chunked reading of uploaded medical certificates.
+
+Uploads are read in fixed-size chunks, decoded incrementally and handed on
+piece by piece, so peak memory per upload is a couple of chunks however
+large the file is. The size cap is enforced while reading, before anything
+is buffered, and the charset is sniffed from the first chunk instead of
+decoding the whole file twice.
+
+Configuration comes from the environment:
+
+``UPLOAD_MAX_BYTES``   largest accepted certificate in bytes (default 5 MB)
+``UPLOAD_CHUNK_SIZE``  bytes read per chunk (default 64 KB)
+"""
+import codecs
+import os
+
+MAX_UPLOAD_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(5 * 1024 * 1024)))
+CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(64 * 1024)))
+
+# Checked longest first: the UTF-32 LE mark starts with the UTF-16 LE one
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+class UploadTooLarge(ValueError):
+    """The upload is bigger than the configured limit."""
+
+    def __init__(self, max_bytes):
+        super().__init__(f"File is too large. The limit is {max_bytes // (1024 * 1024) or 1} MB.")
+        self.max_bytes = max_bytes
+
+
+def detect_charset(sample):
+    """Best charset for a document that starts with ``sample``.
+
+    A byte-order mark wins; otherwise UTF-8 if the sample is valid UTF-8
+    (a character cut off at the end of the sample is fine) and Latin-1,
+    which accepts any bytes, if not.
+    """
+    for bom, charset in _BOMS:
+        if sample.startswith(bom):
+            return charset
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return 'latin-1'
+    return 'utf-8'
+
+
+def iter_chunks(stream, max_bytes=MAX_UPLOAD_BYTES, chunk_size=CHUNK_SIZE):
+    """Yield ``stream`` in chunks, raising ``UploadTooLarge`` past ``max_bytes``."""
+    total = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        yield chunk
+
+
+def iter_text(stream, max_bytes=MAX_UPLOAD_BYTES, chunk_size=CHUNK_SIZE):
+    """Yield the decoded text of ``stream`` one chunk at a time."""
+    chunks = iter_chunks(stream, max_bytes, chunk_size)
+    first = next(chunks, b'')
+    # Later chunks aren't re-checked: a stray bad byte becomes U+FFFD rather
+    # than failing an upload that was already half processed
+    decoder = codecs.getincrementaldecoder(detect_charset(first))(errors='replace')
+    yield decoder.decode(first)
+    for chunk in chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)